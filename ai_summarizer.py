@@ -1,13 +1,32 @@
 """
 AI总结模块
 """
-from typing import List,Dict,Any,Optional
+import asyncio
+import atexit
+import functools
+import hashlib
+import time
+from pathlib import Path
+from string import Template
+from typing import List,Dict,Any,AsyncIterator,Callable,Optional,Tuple
+import httpx
+import orjson
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel,Field
 from loguru import logger
-from config import OPENAI_API_KEY,OPENAI_BASE_URL,OPENAI_MODEL
+from config import settings
+from semantic_cache import SemanticCache
+from rate_limiter import RateLimiter
+from circuit_breaker import CircuitBreaker,CircuitOpenError
+from news_prefilter import NewsPrefilter
+from importance import IMPORTANCE_LOW, IMPORTANT_LEVELS
+from event_loop import run_async
+
+# LangChain消息类型与OpenAI接口角色的对应关系
+MESSAGE_ROLES = {'system':'system','human':'user','ai':'assistant'}
 
 class NewsAnalysis(BaseModel):
     """
@@ -27,187 +46,263 @@ class NewsAnalysis(BaseModel):
     )
 
 
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+
+@functools.lru_cache(maxsize=1)
+def _load_system_prompt()->str:
+    """读取重要性分析的系统提示（进程内只读取一次）"""
+    return (PROMPTS_DIR / "importance_zh.txt").read_text(encoding="utf-8").strip()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_json_prompt_template()->Template:
+    """读取json模式的分析提示模板，新闻内容占位符为$news_content"""
+    return Template((PROMPTS_DIR / "importance_json_zh.txt").read_text(encoding="utf-8").strip())
+
+
+def _analysis_fingerprint()->str:
+    """分析提示和模型的指纹，任一变化后改用新的缓存目录，不再复用按旧提示/旧模型得出的结果"""
+    parts = [_load_system_prompt(),_load_json_prompt_template().template,settings.openai_model or '',*settings.fallback_models]
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()[:12]
+
+
 class AISummarizer:
     """AI新闻总结"""
 
     def __init__(self):
-        if not OPENAI_API_KEY or not  OPENAI_MODEL:
+        if not settings.openai_api_key or not  settings.openai_model:
             error_msg="OPENAI_API_KEY或OPENAI_MODEL未设置，请检查配置文件和环境变量。"
             logger.error(error_msg)
             raise ValueError(error_msg)
         import os
-        os.environ['OPENAI_API_KEY']=OPENAI_API_KEY
-        if OPENAI_BASE_URL:
-            logger.info(f"使用自定义url，模型为{OPENAI_MODEL}")
-            self.llm=ChatOpenAI(
-                base_url=OPENAI_BASE_URL,
-                model=OPENAI_MODEL,
-                api_key=OPENAI_API_KEY,
-                temperature=0
-            )
+        os.environ['OPENAI_API_KEY']=settings.openai_api_key
+
+        # 所有ChatOpenAI实例共享同一组HTTP/2长连接，避免每次请求重新握手
+        limits = httpx.Limits(max_connections=64,max_keepalive_connections=32)
+        timeout = httpx.Timeout(60.0,connect=5.0)
+        self._http = httpx.AsyncClient(http2=True,limits=limits,timeout=timeout)
+        self._http_sync = httpx.Client(http2=True,limits=limits,timeout=timeout)
+        atexit.register(self.close)
+
+        if settings.openai_base_url:
+            logger.info(f"使用自定义url，模型为{settings.openai_model}")
         else :
-            logger.info(f"使用默认url，模型为{OPENAI_MODEL}")
-            self.llm=ChatOpenAI(
-                model=OPENAI_MODEL,
-                api_key=OPENAI_API_KEY,
-                temperature=0
-            )
+            logger.info(f"使用默认url，模型为{settings.openai_model}")
+        self.llm=self._create_llm(settings.openai_model)
         # 创建总结提示模板 - 专为结构化输出设计
         self.summary_prompt = ChatPromptTemplate.from_messages([
-    ("system", """你是一位专精加密货币和美股市场的资深金融分析师。请客观分析新闻内容对市场的重要性和潜在影响。
-
-重要性评估标准（基于市场影响程度）：
-
-【高重要性 - 可能引发重大市场波动】：
-- SEC、CFTC、Fed等监管机构重要决定或政策变化（利率决议、监管框架、执法行动）
-- 大型机构（>10亿美元）首次大额配置或撤出加密货币/股票
-- 主要ETF获批/拒绝或重大资金流入/流出（>5亿美元）
-- 比特币/以太坊等主流币重大技术升级、分叉或安全事件
-- 主要交易所重大事件（倒闭、被黑、监管处罚、系统故障）
-- 比特币/以太坊单日涨跌幅>15%或创历史新高/新低
-- 美股主要指数（S&P500、纳斯达克）单日涨跌幅>3%
-- 重大宏观经济事件（通胀数据、就业数据、GDP数据超预期）
-- 地缘政治重大事件（战争、制裁、贸易争端）
-- 系统性金融风险事件（银行倒闭、流动性危机）
-
-【中重要性 - 可能影响特定板块或短期情绪】：
-- 中型机构（1-10亿美元）加密货币/股票投资策略变化
-- 区域性监管政策调整或指引发布
-- 主流币种（市值前10）或知名上市公司技术更新、合作伙伴关系
-- DeFi、NFT、Web3、AI、新能源等热门领域重要项目启动或更新
-- 知名人士、企业家、分析师的市场言论或投资建议
-- 单个大型公司财报超预期或重大业务变化
-- 行业政策变化（如AI监管、新能源补贴政策等）
-- 主流币种或知名股票5-15%的价格波动
-
-【低重要性 - 对市场影响有限】：
-- 小规模项目的常规更新或技术改进
-- 一般性市场分析、价格预测或技术分析
-- 个人投资者行为或小额交易
-- 娱乐性质的Meme币或小众项目动态
-- 常规的公司运营更新或人事变动
-- 小幅价格波动（<5%）或正常市场波动
-- 与金融市场无直接关联的新闻
-
-分析时请特别关注：
-1. 新闻对加密货币市场的直接或间接影响
-2. 新闻对美股市场（特别是科技股、金融股）的影响
-3. 宏观经济因素对两个市场的联动影响
-4. 监管政策变化的市场预期影响
-5. 机构资金流向的变化趋势
-
-请基于以上标准分析新闻，并提供：
-- importance: 重要性等级（高/中/低）
-- summary: 如果重要性为中或高，提供简洁的新闻总结，重点说明对市场的潜在影响（不超过200字）；如果为低，可以留空
-- keywords: 如果重要性为中或高，提供3-5个关键词（用逗号分隔），包含相关的市场影响关键词；如果为低，可以留空"""),
-    ("human", "新闻内容：{news_content}")
-])
+            ("system", _load_system_prompt()),
+            ("human", "新闻内容：{news_content}")
+        ])
+        # 预先构建结构化输出和分析链，避免每次调用重复生成schema和Runnable
+        self.structured_llm = self.llm.with_structured_output(NewsAnalysis)
+        if settings.fallback_models:
+            # 主模型失败时依次尝试备用模型，json模式仅作为最后的兜底
+            logger.info(f"备用模型: {','.join(settings.fallback_models)}")
+            self.structured_llm = self.structured_llm.with_fallbacks([
+                self._create_llm(model).with_structured_output(NewsAnalysis)
+                for model in settings.fallback_models
+            ])
+        self.analysis_chain = self.summary_prompt | self.structured_llm
+        # json模式回退使用的LLM，由服务端约束输出为合法JSON
+        self.json_llm = self.llm.bind(response_format={"type":"json_object"})
+        # 单条新闻的完整分析流程（缓存、结构化输出、json模式回退），用于abatch并发执行
+        self.analysis_runner = RunnableLambda(self._a_analyze_unless_open)
+
+        # LLM服务连续失败时熔断，避免逐条等待超时
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            recovery_timeout=settings.llm_breaker_recovery_seconds
+        )
+
+        # 本地预筛选器，明显的低重要性新闻不调用LLM
+        self.prefilter = NewsPrefilter(
+            enabled=settings.prefilter_enabled,
+            embedding_model=settings.prefilter_embedding_model,
+            threshold=settings.prefilter_threshold
+        )
+
+        # 新闻内容的token预算分词器
+        self._enc = self._load_encoding()
+
+        # 异步分析路径的主动限流器，及系统提示的长度（用于估算token）
+        self.rate_limiter = RateLimiter(settings.llm_requests_per_minute,settings.llm_tokens_per_minute)
+        self._prompt_overhead = len(self.summary_prompt.format(news_content=''))
+
+        # 分析结果缓存，重复或高度相似的新闻不再调用LLM（按提示和模型的指纹分目录存放）
+        self.cache = SemanticCache(
+            str(Path(settings.analysis_cache_dir)/_analysis_fingerprint()),
+            semantic_enabled=settings.semantic_cache_enabled,
+            model_name=settings.semantic_cache_model,
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_max_entries
+        )
+        
+    @staticmethod
+    def _load_encoding():
+        """加载模型对应的tiktoken分词器，未知模型使用cl100k_base，加载失败返回None"""
+        try:
+            import tiktoken
+            try:
+                return tiktoken.encoding_for_model(settings.openai_model)
+            except KeyError:
+                return tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            logger.warning(f"加载tiktoken分词器失败，按字符数截断新闻内容：{e}")
+            return None
+
+    def _create_llm(self,model:str)->ChatOpenAI:
+        """创建指定模型的ChatOpenAI实例"""
+        if settings.openai_base_url:
+            return ChatOpenAI(
+                base_url=settings.openai_base_url,
+                model=model,
+                api_key=settings.openai_api_key,
+                temperature=0,
+                http_client=self._http_sync,
+                http_async_client=self._http
+            )
+        return ChatOpenAI(
+            model=model,
+            api_key=settings.openai_api_key,
+            temperature=0,
+            http_client=self._http_sync,
+            http_async_client=self._http
+        )
+
+    def close(self):
+        """关闭共享的HTTP连接池"""
+        try:
+            self._http_sync.close()
+            if not self._http.is_closed:
+                run_async(self._http.aclose(),timeout=5)
+        except Exception as e:
+            logger.debug(f"关闭HTTP连接池失败：{e}")
         
     def analyze_news_importance(self,news_content:str)->Dict[str,Any]:
         """
-        分析单条新闻的重要性
+        分析单条新闻的重要性（同步封装，在后台事件循环中执行a_analyze_news_importance）
         Args:
             news_content：新闻内容
 
         Returns:
                 Dict：包含重要性等级、总结、关键词的字典
         """
+        return run_async(self.a_analyze_news_importance(news_content))
+
+    async def a_analyze_news_importance(self,news_content:str)->Dict[str,Any]:
+        """
+        异步分析单条新闻的重要性（缓存、结构化输出、json模式回退）
+        Args:
+            news_content：新闻内容
+
+        Returns:
+                Dict：包含重要性等级、总结、关键词的字典
+        """
+        # 嵌入计算较耗CPU，放到线程中执行以免阻塞事件循环
+        cached = await asyncio.to_thread(self.cache.get,news_content)
+        if cached is not None:
+            return cached
+        return await self._a_analyze_uncached(news_content)
+
+    async def _a_analyze_uncached(self,news_content:str)->Dict[str,Any]:
+        """调用LLM分析新闻（调用方已确认缓存未命中），成功后写入缓存"""
         try:
-            # 尝试结构化输出
-            structured_llm=self.llm.with_structured_output(NewsAnalysis)
-            messages = self.summary_prompt.format_messages(news_content=news_content)
-            result=structured_llm.invoke(messages)
+            clipped_content = self._clip(news_content)
+            await self.rate_limiter.acquire(self._estimate_tokens(self._prompt_overhead+len(clipped_content)))
+            result=await self.breaker.acall(self.analysis_chain.ainvoke,{'news_content':clipped_content})
+            self.rate_limiter.on_success()
 
             result_dict = {
                 'importance':result.importance,
                 'summary':result.summary or '',
                 'keywords':result.keywords or ''
             }
-            logger.debug(f"AI分析结果（结构化）:{result_dict}")
-            return result_dict
+            logger.opt(lazy=True).debug("AI分析结果（结构化）:{}", lambda: result_dict)
+        except CircuitOpenError as e:
+            return self._failed_analysis(e)
         except Exception as e:
             logger.info(f"结构化输出失败，尝试json模式：{e}")
+            self.rate_limiter.record_error(e)
 
-            # 尝试使用json模式
             try:
-                return self._analyze_with_json_mode(news_content)
+                result_dict = await self._a_analyze_with_json_mode(news_content)
             except Exception as e2:
                 logger.error(f"json模式也失败：{e2}")
-                # 返回失败
-                return{
-                    'importance':'FAILED',
-                    'summary':f'AI分析失败:{str(e2)}',
-                    'keywords':'AI分析失败'
-                }
-            
+                return self._failed_analysis(e2)
+
+        await asyncio.to_thread(self.cache.put,news_content,result_dict)
+        return result_dict
         
-    def _analyze_with_json_mode(self,news_content:str)->Dict[str,Any]:
-        """使用json模式分析新闻"""
-        json_prompt = f"""请分析以下新闻对加密货币和美股市场的重要性和影响，并以JSON格式回复。
-
-新闻内容：{news_content}
-
-重要性评估标准（基于市场影响程度）：
-
-【高重要性 - 可能引发重大市场波动】：
-- SEC、CFTC、Fed等监管机构重要决定（利率决议、监管框架、执法行动）
-- 大型机构（>10亿美元）首次大额配置或撤出加密货币/股票
-- 主要ETF获批/拒绝或重大资金流入/流出（>5亿美元）
-- 比特币/以太坊重大技术升级、分叉或安全事件
-- 主要交易所重大事件（倒闭、被黑、监管处罚）
-- 主流币或美股指数单日涨跌幅>15%或>3%，创历史新高/新低
-- 重大宏观经济事件（通胀、就业、GDP数据超预期）
-- 地缘政治重大事件、系统性金融风险事件
-
-【中重要性 - 可能影响特定板块或短期情绪】：
-- 中型机构投资策略变化、区域性监管政策调整
-- 主流币种（市值前10）或知名上市公司技术更新、合作关系
-- DeFi、NFT、Web3、AI、新能源等热门领域重要项目
-- 知名人士、企业家、分析师的市场言论或投资建议
-- 单个大型公司财报超预期或重大业务变化
-- 行业政策变化、主流资产5-15%的价格波动
-
-【低重要性 - 对市场影响有限】：
-- 小规模项目常规更新、一般性市场分析或价格预测
-- 个人投资者行为、娱乐性Meme币、小众项目动态
-- 常规公司运营更新、小幅价格波动（<5%）
-- 与金融市场无直接关联的新闻
-
-分析时请特别关注新闻对加密货币市场和美股市场的直接或间接影响，包括宏观经济因素的联动影响、监管政策变化的市场预期影响、机构资金流向变化等。
-
-请严格按照以下JSON格式回复：
-{{
-    "importance": "高/中/低",
-    "summary": "新闻总结，重点说明对市场的潜在影响（如果重要性为低可以留空）",
-    "keywords": "关键词1,关键词2,关键词3,市场影响关键词（如果重要性为低可以留空）"
-}}
-
-只返回JSON，不要任何其他内容。"""
-        from langchain_core.messages import HumanMessage
-        response =self.llm.invoke([HumanMessage(content=json_prompt)])
-        response_text = str(response.content).strip()
-
-        import json 
-        import re
-
-        # 提取json部分
-        json_match =re.search(r'\{.*}',response_text,re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            result_dict = json.loads(json_str)
-
-            # 标准化结果
-            return{
-                'importance':result_dict.get('importance','低'),
-                'summary':result_dict.get('summary',''),
-                'keywords':result_dict.get('keywords','')
-            }
-        else:
-            raise ValueError(f"无法从响应中提取JSON，AI回复:{response_text[:100]}...")
+    async def _a_analyze_unless_open(self,news_content:str)->Optional[Dict[str,Any]]:
+        """先查缓存，未命中且熔断器打开时直接跳过（返回None），否则调用LLM分析"""
+        cached = await asyncio.to_thread(self.cache.get,news_content)
+        if cached is not None:
+            return cached
+        if self.breaker.is_open:
+            return None
+        return await self._a_analyze_uncached(news_content)
+
+    @staticmethod
+    def _failed_analysis(error:Any)->Dict[str,Any]:
+        """构建分析失败时的结果"""
+        return{
+            'importance':'FAILED',
+            'summary':f'AI分析失败:{str(error)}',
+            'keywords':'AI分析失败'
+        }
+
+    async def _a_analyze_with_json_mode(self,news_content:str)->Dict[str,Any]:
+        """使用json模式异步分析新闻"""
+        json_prompt = self._build_json_prompt(news_content)
+        await self.rate_limiter.acquire(self._estimate_tokens(len(json_prompt)))
+        try:
+            response =await self.breaker.acall(self.json_llm.ainvoke,[HumanMessage(content=json_prompt)])
+        except Exception as e:
+            self.rate_limiter.record_error(e)
+            raise
+        self.rate_limiter.on_success()
+        return self._parse_json_response(str(response.content).strip())
+
+    @staticmethod
+    def _estimate_tokens(prompt_chars:int)->int:
+        """粗略估算一次请求消耗的token数：中文约每字1个token，另加输出预留"""
+        return prompt_chars+500
+
+    def _clip(self,text:str)->str:
+        """将新闻内容截断到NEWS_MAX_TOKENS个token以内"""
+        if self._enc is None:
+            # 没有可用的分词器时按字符截断（中文约每字1个token）
+            return text[:settings.news_max_tokens]
+        ids = self._enc.encode(text,disallowed_special=())
+        if len(ids)<=settings.news_max_tokens:
+            return text
+        logger.opt(lazy=True).debug("新闻内容共{}个token，截断到{}个", lambda: len(ids), lambda: settings.news_max_tokens)
+        return self._enc.decode(ids[:settings.news_max_tokens])
+
+    def _build_json_prompt(self,news_content:str)->str:
+        """构建json模式的分析提示"""
+        news_content = self._clip(news_content)
+        return _load_json_prompt_template().substitute(news_content=news_content)
+
+    def _parse_json_response(self,response_text:str)->Dict[str,Any]:
+        """解析json模式的回复（JSON模式下回复本身即为JSON对象）"""
+        try:
+            result_dict = orjson.loads(response_text)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"AI回复不是合法的JSON:{e}，AI回复:{response_text[:100]}...") from e
+
+        # 标准化结果
+        return{
+            'importance':result_dict.get('importance',IMPORTANCE_LOW),
+            'summary':result_dict.get('summary',''),
+            'keywords':result_dict.get('keywords','')
+        }
         
     def filter_important_news(self,news_list:List[Dict[str,str]])->List[Dict[str,Any]]:
         """
-        筛选重要新闻并生成总结
+        筛选重要新闻并生成总结（同步封装，内部并发执行a_filter_important_news）
         
         Args:
             news_list:新闻列表
@@ -215,15 +310,188 @@ class AISummarizer:
         Returns:
             List[Dict]:重要新闻列表，包含原始新闻和AI分析结果
         """
-        important_news = []
+        if settings.openai_batch_enabled:
+            return self.filter_important_news_batch(news_list)
+        return run_async(self.a_filter_important_news(news_list))
+
+    def filter_important_news_batch(self,news_list:List[Dict[str,str]])->List[Dict[str,Any]]:
+        """
+        通过OpenAI Batch API一次性提交所有新闻进行分析，新闻数量较少或任务失败时改用并发模式
+
+        Args:
+            news_list:新闻列表
+
+        Returns:
+            List[Dict]:重要新闻列表，包含原始新闻和AI分析结果
+        """
+        if len(news_list)<settings.openai_batch_threshold:
+            logger.info(f"新闻数量{len(news_list)}低于Batch阈值{settings.openai_batch_threshold}，使用并发模式分析")
+            return run_async(self.a_filter_important_news(news_list))
+
+        contents,owners = self._dedupe_contents(news_list)
+
+        # 预筛选出的低重要性新闻和已缓存的新闻无需提交到Batch任务
+        analyses = self.prefilter.classify(contents)
+        analyses = [analysis or self.cache.get(content) for content,analysis in zip(contents,analyses)]
+        pending = [i for i,analysis in enumerate(analyses) if analysis is None]
+
+        if pending:
+            logger.info(f"开始通过Batch API分析{len(pending)}条新闻的重要性（{len(contents)-len(pending)}条命中缓存）...")
+            try:
+                batch_results = self._run_batch_job([contents[i] for i in pending])
+            except Exception as e:
+                logger.error(f"Batch API分析失败，改用并发模式：{e}")
+                return run_async(self.a_filter_important_news(news_list))
+
+            for i,analysis in zip(pending,batch_results):
+                analyses[i] = analysis
+                self.cache.put(contents[i],analysis)
+            self.cache.save()
+
+        return self._collect_important_news(news_list,[analyses[j] for j in owners])
+
+    @staticmethod
+    def _dedupe_contents(news_list:List[Dict[str,str]])->Tuple[List[str],List[int]]:
+        """
+        按内容哈希去重
+
+        Returns:
+            Tuple:去重后的内容列表（保持首次出现的顺序），以及每条新闻对应的去重后下标
+        """
+        index_of: Dict[bytes,int] = {}
+        contents: List[str] = []
+        owners: List[int] = []
+        for news in news_list:
+            key = hashlib.blake2b(news['content'].encode('utf-8'),digest_size=16).digest()
+            if key not in index_of:
+                index_of[key] = len(contents)
+                contents.append(news['content'])
+            owners.append(index_of[key])
+
+        if len(contents)<len(news_list):
+            logger.info(f"去除{len(news_list)-len(contents)}条内容重复的新闻，实际分析{len(contents)}条")
+        return contents,owners
+
+    def _run_batch_job(self,contents:List[str])->List[Dict[str,Any]]:
+        """提交Batch任务并等待完成，按内容顺序返回分析结果"""
+        from openai import OpenAI
+
+        client = OpenAI(api_key=settings.openai_api_key,base_url=settings.openai_base_url,http_client=self._http_sync)
+        response_format = {
+            'type':'json_schema',
+            'json_schema':{'name':'NewsAnalysis','schema':NewsAnalysis.model_json_schema()}
+        }
+
+        # 每条新闻对应一行/v1/chat/completions请求，custom_id为新闻下标
+        lines = []
+        for i,content in enumerate(contents):
+            messages = self.summary_prompt.format_messages(news_content=self._clip(content))
+            lines.append(orjson.dumps({
+                'custom_id':str(i),
+                'method':'POST',
+                'url':'/v1/chat/completions',
+                'body':{
+                    'model':settings.openai_model,
+                    'temperature':0,
+                    'messages':[{'role':MESSAGE_ROLES[m.type],'content':m.content} for m in messages],
+                    'response_format':response_format
+                }
+            }))
+
+        batch_file = client.files.create(
+            file=('news_batch.jsonl',b'\n'.join(lines)),
+            purpose='batch'
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info(f"Batch任务已提交，ID:{batch.id}")
+
+        # 轮询任务状态直到结束
+        deadline = time.monotonic()+settings.openai_batch_timeout_seconds
+        while batch.status not in ('completed','failed','expired','cancelled'):
+            if time.monotonic()>deadline:
+                client.batches.cancel(batch.id)
+                raise TimeoutError(f"Batch任务超过{settings.openai_batch_timeout_seconds}秒未完成，已取消")
+            time.sleep(settings.openai_batch_poll_seconds)
+            batch = client.batches.retrieve(batch.id)
+            logger.debug(f"Batch任务状态:{batch.status}")
+
+        if batch.status!='completed' or not batch.output_file_id:
+            raise RuntimeError(f"Batch任务未成功完成，状态:{batch.status}")
+
+        # 按custom_id还原结果顺序，缺失的条目视为失败
+        analyses = [self._failed_analysis('Batch结果缺失') for _ in contents]
+        output = client.files.content(batch.output_file_id).content
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            index = int(item['custom_id'])
+            response = item.get('response') or {}
+            if item.get('error') or response.get('status_code')!=200:
+                analyses[index] = self._failed_analysis(item.get('error') or response.get('body'))
+                continue
+            try:
+                content = response['body']['choices'][0]['message']['content']
+                result = NewsAnalysis.model_validate_json(content)
+                analyses[index] = {
+                    'importance':result.importance,
+                    'summary':result.summary or '',
+                    'keywords':result.keywords or ''
+                }
+            except Exception as e:
+                analyses[index] = self._failed_analysis(e)
+
+        logger.info(f"Batch任务完成，共获得{len(analyses)}条分析结果")
+        return analyses
 
-        logger.info(f"开始分析{len(news_list)}条新闻的重要性...")
+    async def a_filter_important_news(self,news_list:List[Dict[str,str]])->List[Dict[str,Any]]:
+        """
+        并发筛选重要新闻并生成总结，通过abatch的max_concurrency限制同时进行中的请求数
+
+        Args:
+            news_list:新闻列表
+
+        Returns:
+            List[Dict]:重要新闻列表，包含原始新闻和AI分析结果
+        """
+        logger.info(f"开始分析{len(news_list)}条新闻的重要性（并发上限{settings.llm_max_concurrency}）...")
+
+        # 内容相同的新闻只分析一次，结果再分发给每条新闻
+        contents,owners = self._dedupe_contents(news_list)
 
-        for i,news in enumerate(news_list):
-            logger.info(f"正在分析第{i+1}/{len(news_list)}条新闻...")
+        # 本地预筛选出的低重要性新闻不再调用LLM
+        analyses = await asyncio.to_thread(self.prefilter.classify,contents)
+        pending = [i for i,analysis in enumerate(analyses) if analysis is None]
 
-            # 分析新闻重要性
-            analysis = self.analyze_news_importance(news['content'])
+        # 单条失败以异常对象返回，不会中断整个批次
+        results = await self.analysis_runner.abatch(
+            [contents[i] for i in pending],
+            config={'max_concurrency':settings.llm_max_concurrency},
+            return_exceptions=True
+        )
+        for i,result in zip(pending,results):
+            analyses[i] = result
+        await asyncio.to_thread(self.cache.save)
+
+        return self._collect_important_news(news_list,[analyses[j] for j in owners])
+
+    def _collect_important_news(self,news_list:List[Dict[str,str]],analyses:List[Any])->List[Dict[str,Any]]:
+        """根据分析结果筛选出中等和高重要性的新闻"""
+        important_news = []
+        skipped_count = 0
+
+        for news,analysis in zip(news_list,analyses):
+            if analysis is None:
+                skipped_count += 1
+                continue
+
+            if isinstance(analysis,BaseException):
+                logger.error(f"新闻分析异常，跳过:{news['title'][:50]}...(错误:{analysis})")
+                continue
 
             # 检查分析是否失败
             if analysis['importance']=='FAILED':
@@ -231,7 +499,7 @@ class AISummarizer:
                 continue
 
             # 只保留中等和高重要性的新闻
-            if analysis['importance'] in ['中','高']:
+            if analysis['importance'] in IMPORTANT_LEVELS:
                 important_news.append({
                     'original_title': news['title'],
                     'original_content': news['content'],
@@ -240,30 +508,52 @@ class AISummarizer:
                     'keywords': analysis['keywords']
                 })
                 logger.info(f"发现重要新闻: {news['title'][:50]}... (重要性: {analysis['importance']})")
+        if skipped_count:
+            logger.warning(f"LLM熔断器已打开，跳过剩余{skipped_count}条新闻，仅返回部分结果")
         logger.info(f"筛选完成，共发现{len(important_news)}条重要新闻")
         return important_news
     
-    def create_final_summary(self,important_news:List[Dict[str,Any]])->str:
+    @staticmethod
+    def _format_news_summaries(important_news:List[Dict[str,Any]])->str:
+        """把重要新闻格式化为带序号的摘要列表"""
+        return "\n".join(
+            f"{i}.{news['summary']}(重要性:{news['importance']})" for i,news in enumerate(important_news,1)
+        )
+
+    async def _astream_text(self,prompt:str)->AsyncIterator[str]:
+        """流式调用LLM，逐段返回生成的文本"""
+        async for chunk in self.llm.astream([HumanMessage(content=prompt)]):
+            if chunk.content:
+                yield str(chunk.content)
+
+    def _collect_stream(self,stream:AsyncIterator[str],on_chunk:Optional[Callable[[str],None]]=None)->str:
+        """在后台事件循环中消费流式输出并拼接为完整文本"""
+        async def _consume()->str:
+            parts=[]
+            async for text in stream:
+                parts.append(text)
+                if on_chunk is not None:
+                    on_chunk(text)
+            return "".join(parts)
+
+        return run_async(_consume()).strip()
+
+    async def acreate_final_summary(self,important_news:List[Dict[str,Any]])->AsyncIterator[str]:
         """
-        为重要新闻创建最终总结
-        
+        为重要新闻流式创建最终总结
+
         Args:
             important_news: 重要新闻列表
-            
-        Returns:
-            str: 最终总结文本
+
+        Yields:
+            str: 模型生成的文本片段，调用失败时抛出异常
         """
         if not important_news:
-            return "今日暂无重要新闻。"
-        try:
-            # 构建总结提示
-            news_summaries =[]
-            for i,news in enumerate(important_news,1):
-                news_summaries.append(f"{i}.{news['summary']}(重要性:{news['importance']})")
+            yield "今日暂无重要新闻。"
+            return
 
-            combined_content = "\n".join(news_summaries)
-            
-            final_prompt=f"""请基于以下重要新闻总结，创建一个综合性的日报总结：
+        combined_content = self._format_news_summaries(important_news)
+        final_prompt=f"""请基于以下重要新闻总结，创建一个综合性的日报总结：
 
 {combined_content}
 
@@ -273,46 +563,43 @@ class AISummarizer:
 3. 如果有相关联的事件，请指出其关联性
 4. 使用专业但易懂的语言
 """
-            messages = [HumanMessage(content=final_prompt)]
-            response = self.llm.invoke(messages)
-
-            # 安全获取响应内容
-            if hasattr(response,'content'):
-                return str(response.content).strip()
-            else:
-                return str(response).strip()
+        async for text in self._astream_text(final_prompt):
+            yield text
+
+    def create_final_summary(self,important_news:List[Dict[str,Any]],on_chunk:Optional[Callable[[str],None]]=None)->str:
+        """
+        为重要新闻创建最终总结
+        
+        Args:
+            important_news: 重要新闻列表
+            on_chunk: 可选回调，每收到一段流式输出时调用
             
+        Returns:
+            str: 最终总结文本
+        """
+        if not important_news:
+            return "今日暂无重要新闻。"
+        try:
+            return self._collect_stream(self.acreate_final_summary(important_news),on_chunk)
         except Exception as e:
             logger.error(f"创建最终总结失败:{e}")
             # 如果AI总结失败，返回简单的列表总结
             summaries = [news['summary']for news in important_news]
             return "今日重要新闻总结：\n"+"\n".join(f"`{summary}"for summary in summaries)
-        
-    def merge_summaries(self,existing_summary:str,new_summary:str,new_important_news:List[Dict[str,Any]])->str:
+
+    async def amerge_summaries(self,existing_summary:str,new_important_news:List[Dict[str,Any]])->AsyncIterator[str]:
         """
-        合并已有总结和新总结
+        流式合并已有总结和新发现的重要新闻
 
         Args:
             existing_summary: 已有的总结内容
-            new_summary: 新生成的总结内容
             new_important_news: 新发现的重要新闻列表
 
-        Returns:
-            str: 合并后的综合总结
+        Yields:
+            str: 模型生成的文本片段，调用失败时抛出异常
         """
-        if not new_important_news:
-            logger.info("没有新的重要新闻，保持原有总结")
-            return existing_summary
-        
-        try:
-            # 构建合并提示
-            new_news_summaries=[]
-            for i,news in enumerate(new_important_news,1):
-                new_news_summaries.append(f"{i}.{news['summary']}(重要性:{news['importance']})")
-
-            new_content="\n".join(new_news_summaries)
-
-            merge_prompt = f"""请将已有的新闻总结与新发现的重要新闻进行合并，生成一个更全面的综合总结。
+        new_content = self._format_news_summaries(new_important_news)
+        merge_prompt = f"""请将已有的新闻总结与新发现的重要新闻进行合并，生成一个更全面的综合总结。
 
 已有总结：
 {existing_summary}
@@ -327,16 +614,28 @@ class AISummarizer:
 4. 保持专业但易懂的语言
 5. 总结长度控制在400字以内
 6. 按重要性和时间逻辑组织内容"""
-            
-            from langchain_core.messages import HumanMessage
-            response = self.llm.invoke([HumanMessage(content=merge_prompt)])
+        async for text in self._astream_text(merge_prompt):
+            yield text
+        
+    def merge_summaries(self,existing_summary:str,new_summary:str,new_important_news:List[Dict[str,Any]],on_chunk:Optional[Callable[[str],None]]=None)->str:
+        """
+        合并已有总结和新总结
 
-            # 安全获取响应内容
-            if hasattr(response, 'content'):
-                merged_summary = str(response.content).strip()
-            else:
-                merged_summary = str(response).strip()
+        Args:
+            existing_summary: 已有的总结内容
+            new_summary: 新生成的总结内容
+            new_important_news: 新发现的重要新闻列表
+            on_chunk: 可选回调，每收到一段流式输出时调用
 
+        Returns:
+            str: 合并后的综合总结
+        """
+        if not new_important_news:
+            logger.info("没有新的重要新闻，保持原有总结")
+            return existing_summary
+        
+        try:
+            merged_summary = self._collect_stream(self.amerge_summaries(existing_summary,new_important_news),on_chunk)
             logger.info("成功合并新闻总结")
             return merged_summary
         
@@ -345,8 +644,10 @@ class AISummarizer:
             # 如果合并失败，简单拼接
             return f"{existing_summary}\n\n【新增内容】\n{new_summary}"
 
-# 全局AI总结器实例
-ai_summarizer = AISummarizer()
+@functools.lru_cache(maxsize=1)
+def get_ai_summarizer() -> AISummarizer:
+    """获取全局AI总结器实例，首次调用时才创建（校验配置、初始化LLM客户端）"""
+    return AISummarizer()
 
 
 
@@ -381,6 +682,8 @@ def test_ai_summarizer():
     ]
     
     try:
+        ai_summarizer = get_ai_summarizer()
+
         # 测试重要性分析
         important_news = ai_summarizer.filter_important_news(test_news)
         
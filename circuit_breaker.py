@@ -0,0 +1,106 @@
+"""
+熔断器模块 - LLM服务故障时快速失败
+"""
+import threading
+import time
+from typing import Any, Awaitable, Callable
+from loguru import logger
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    熔断器（关闭/打开/半开）
+
+    - 关闭：正常放行请求，连续失败达到failure_threshold次后转为打开
+    - 打开：直接拒绝请求，经过recovery_timeout秒后转为半开
+    - 半开：只放行一个试探请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._state = self.CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态，打开超过recovery_timeout后视为半开"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+                logger.info("熔断器进入半开状态，允许试探请求")
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """是否处于拒绝请求的打开状态"""
+        return self.state == self.OPEN
+
+    def _before_call(self):
+        """检查是否放行请求"""
+        state = self.state
+        with self._lock:
+            if state == self.OPEN:
+                raise CircuitOpenError("LLM服务熔断中，跳过调用")
+            if state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError("LLM服务熔断试探中，跳过调用")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        """记录成功请求"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("试探请求成功，熔断器关闭")
+            self._state = self.CLOSED
+            self._failure_count = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """记录失败请求"""
+        with self._lock:
+            self._failure_count += 1
+            if self._state == self.HALF_OPEN or self._failure_count >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"LLM连续失败 {self._failure_count} 次，熔断器打开，{self.recovery_timeout} 秒内直接跳过调用"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """通过熔断器执行同步调用"""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """通过熔断器执行异步调用"""
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException:
+            # 包括任务被取消，避免半开状态的试探标记无法释放
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
@@ -1,36 +1,134 @@
 """
 配置文件
+
+所有配置在首次导入时从环境变量和.env文件读取一次，汇总为不可变的settings对象
 """
-import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
 from dotenv import load_dotenv
+from pydantic import Field
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
 
-# 加载环境变量 - 强制加载.env文件
+# .env中的变量同时导出到环境变量，供直接读取os.environ的第三方库使用（如LANGCHAIN_*追踪、HTTP(S)_PROXY、OPENAI_ORG_ID）
 load_dotenv('.env', override=True)
 
-# 数据库配置
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': int(os.getenv('DB_PORT', '3306')),
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'database': os.getenv('DB_NAME', 'news_agent'),
-    'charset': 'utf8mb4',
-    'ssl_disabled': False,  # 启用SSL
-    'ssl_verify_cert': False,  # 跳过证书验证
-    'ssl_verify_identity': False  # 跳过身份验证
-}
-
-# API配置
-NEWS_API_URL = "http://volefuture.com/redis/get_latest_news/"
-
-# OpenAI配置 (如果使用OpenAI)
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
-OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
-OPENAI_MODEL = os.getenv('OPENAI_MODEL')
-
-# 调度配置
-SCHEDULE_HOURS = 6  # 每6小时执行一次
-
-# 日志配置
-LOG_LEVEL = os.getenv('LOG_LEVEL', "INFO")
-LOG_FILE = "news_agent.log"
+
+class Settings(BaseSettings):
+    """系统配置，字段名对应大写的环境变量名（如 db_host 对应 DB_HOST）"""
+
+    model_config = SettingsConfigDict(
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore',
+        frozen=True
+    )
+
+    # 数据库配置
+    db_host: str = 'localhost'
+    db_port: int = Field(3306, gt=0)
+    db_user: str = 'root'
+    db_password: str = ''
+    db_name: str = 'news_agent'
+    db_pool_size: int = Field(8, gt=0, le=32)  # 连接池大小（最大32）
+    # 已入库标题的内存缓存，重复出现的新闻不再发往数据库
+    seen_titles_lru_size: int = Field(10000, gt=0)
+
+    # API配置
+    news_api_url: str = "http://volefuture.com/redis/get_latest_news/"
+
+    # OpenAI配置 (如果使用OpenAI)
+    openai_api_key: str = ''
+    openai_base_url: Optional[str] = None
+    openai_model: Optional[str] = None
+    # 备用模型（逗号分隔），主模型结构化输出失败时依次尝试
+    openai_fallback_models: str = ''
+
+    # 单条新闻发送给LLM的最大token数，超出部分截断
+    news_max_tokens: int = Field(2000, gt=0)
+
+    # AI分析并发配置（同时进行中的LLM请求上限）
+    llm_max_concurrency: int = Field(10, gt=0)
+    # LLM限流配置（请求前主动限速，避免触发429）
+    llm_requests_per_minute: int = Field(500, gt=0)
+    llm_tokens_per_minute: int = Field(200000, gt=0)
+    # LLM熔断配置（连续失败次数达到阈值后，在恢复时间内直接跳过调用）
+    llm_breaker_failure_threshold: int = Field(5, gt=0)
+    llm_breaker_recovery_seconds: int = Field(60, ge=0)
+
+    # OpenAI Batch API配置（离线批量分析，费用减半，需服务商支持/v1/batches）
+    openai_batch_enabled: bool = False
+    openai_batch_threshold: int = Field(20, ge=0)  # 新闻数量低于该值时走并发模式
+    openai_batch_poll_seconds: int = Field(30, gt=0)
+    openai_batch_timeout_seconds: int = Field(14400, gt=0)  # 超时后取消任务并改用并发模式
+
+    # 本地预筛选配置（规则始终可用，嵌入判断需设置模型，如 BAAI/bge-small-zh-v1.5）
+    prefilter_enabled: bool = True
+    prefilter_embedding_model: str = ''
+    prefilter_threshold: float = Field(0.8, ge=0, le=1)
+
+    # 分析结果缓存配置（精确匹配始终启用，语义匹配需安装sentence-transformers和faiss-cpu）
+    analysis_cache_dir: str = '.cache/analysis'
+    semantic_cache_enabled: bool = False
+    semantic_cache_model: str = 'paraphrase-multilingual-MiniLM-L12-v2'
+    semantic_cache_threshold: float = Field(0.92, ge=0, le=1)
+    semantic_cache_max_entries: int = Field(20000, gt=0)
+
+    # 是否通过LangGraph执行工作流（默认按顺序直接调用各节点，节省状态复制开销，便于调试时切换）
+    use_langgraph: bool = False
+
+    # 调度配置
+    schedule_hours: int = Field(6, gt=0)  # 每6小时执行一次
+    # Web模式下多个worker通过该文件锁保证只有一个进程运行调度器
+    scheduler_lock_file: str = '/tmp/news_agent_scheduler.lock'
+    # 停止调度器时等待正在执行的任务完成的最长秒数
+    shutdown_grace_seconds: int = Field(30, ge=0)
+    # 调度器子进程写入的状态文件，所有worker通过它返回调度器状态
+    scheduler_state_file: str = '/tmp/news_agent_scheduler.json'
+
+    # Web管理端点（POST /test、POST /run-once）的访问令牌，通过X-Admin-Token请求头传入；为空时禁用这些端点
+    admin_token: str = ''
+
+    # 日志配置
+    log_level: str = "INFO"
+    log_file: str = "news_agent.log"
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        """.env文件优先于系统环境变量（与原先 load_dotenv(override=True) 的行为一致）"""
+        return init_settings, dotenv_settings, env_settings, file_secret_settings
+
+    @property
+    def db_config(self) -> Dict[str, Any]:
+        """mysql.connector的连接参数"""
+        return {
+            'host': self.db_host,
+            'port': self.db_port,
+            'user': self.db_user,
+            'password': self.db_password,
+            'database': self.db_name,
+            'charset': 'utf8mb4',
+            'ssl_disabled': False,  # 启用SSL
+            'ssl_verify_cert': False,  # 跳过证书验证
+            'ssl_verify_identity': False  # 跳过身份验证
+        }
+
+    @property
+    def fallback_models(self) -> List[str]:
+        """备用模型列表"""
+        return [m.strip() for m in self.openai_fallback_models.split(',') if m.strip()]
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """获取全局配置（只解析一次）"""
+    return Settings()
+
+
+settings = get_settings()
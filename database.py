@@ -1,119 +1,183 @@
 """
 数据库连接和操作模块
 """
-import mysql.connector
-from mysql.connector import Error
-from typing import Optional, Dict, Any, List
+import threading
+from contextlib import contextmanager
+from cachetools import LRUCache
+from mysql.connector import Error, pooling
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from loguru import logger
-from config import DB_CONFIG
+from config import settings
+from importance import IMPORTANCE_LOW
 
 
 class DatabaseManager:
-    """MySQL数据库管理器"""
+    """MySQL数据库管理器（基于连接池，可在多线程间共享）"""
     
     def __init__(self):
-        self.connection = None
-        self.cursor = None
+        self.pool: Optional[pooling.MySQLConnectionPool] = None
+        self._pool_lock = threading.Lock()
+
+        # 最近已确认存在于数据库中的标题，重复出现的新闻不再发往数据库
+        self._seen_lock = threading.Lock()
+        self._seen_lru: LRUCache = LRUCache(maxsize=settings.seen_titles_lru_size)
+
+    def remember_titles(self, titles: Iterable[str]):
+        """记录已确认存在于数据库中的标题"""
+        with self._seen_lock:
+            for title in titles:
+                self._seen_lru[title] = True
+
+    def is_known_title(self, title: str) -> bool:
+        """标题是否最近已确认存在（只查内存，不访问数据库）"""
+        with self._seen_lock:
+            return title in self._seen_lru
     
     def connect(self) -> bool:
-        """连接到数据库"""
-        try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
-            if self.connection.is_connected():
-                self.cursor = self.connection.cursor()
-                logger.info("成功连接到MySQL数据库")
+        """初始化数据库连接池"""
+        with self._pool_lock:
+            if self.pool is not None:
                 return True
-        except Error as e:
-            logger.error(f"连接数据库失败: {e}")
-            return False
-    
-    def disconnect(self):
-        """断开数据库连接"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            logger.info("数据库连接已关闭")
+            try:
+                # 每条语句自动提交，借出时无需重置会话（省去COM_RESET_CONNECTION和COMMIT往返）
+                self.pool = pooling.MySQLConnectionPool(
+                    pool_name="news",
+                    pool_size=settings.db_pool_size,
+                    pool_reset_session=False,
+                    autocommit=True,
+                    **settings.db_config
+                )
+                logger.info(f"成功创建MySQL连接池，大小: {settings.db_pool_size}")
+                return True
+            except Error as e:
+                logger.error(f"连接数据库失败: {e}")
+                return False
+
+    @contextmanager
+    def _cursor(self, dictionary: bool = False):
+        """从连接池借出连接和游标，用完自动归还；出错时回滚。dictionary为True时游标直接返回字典行"""
+        if not self.connect():
+            raise Error(msg="数据库连接池不可用")
+
+        connection = self.pool.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=dictionary)
+            yield connection, cursor
+        except Exception:
+            try:
+                connection.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            # 对池化连接调用close会将其归还到连接池（创建游标失败时同样归还）
+            connection.close()
     
     def test_connection(self) -> bool:
         """测试数据库连接"""
         try:
-            if self.connect():
+            with self._cursor() as (_, cursor):
                 # 测试查询
-                self.cursor.execute("SELECT 1")
-                result = self.cursor.fetchone()
-                self.disconnect()
+                cursor.execute("SELECT 1")
+                result = cursor.fetchone()
                 return result is not None
         except Error as e:
             logger.error(f"数据库连接测试失败: {e}")
             return False
     
-    def insert_news(self, title: str, summary: str, content: str, importance: str = '低') -> bool:
-        """插入新闻数据"""
+    def insert_news(self, title: str, summary: str, content: str, importance: str = IMPORTANCE_LOW) -> bool:
+        """插入新闻数据，标题已存在时忽略（依赖title唯一索引），返回是否为新插入"""
+        query = """
+        INSERT IGNORE INTO news (title, summary, importance, content)
+        VALUES (%s, %s, %s, %s)
+        """
+        values = (title, summary, importance, content)
+
         try:
-            if not self.connection or not self.connection.is_connected():
-                if not self.connect():
-                    return False
-
-            query = """
-            INSERT INTO news (title, summary, importance, content)
-            VALUES (%s, %s, %s, %s)
-            """
-            values = (title, summary, importance, content)
-            
-            self.cursor.execute(query, values)
-            self.connection.commit()
-            
-            logger.info(f"成功插入新闻: {title[:50]}...")
-            return True
+            with self._cursor() as (_, cursor):
+                cursor.execute(query, values)
+                inserted = cursor.rowcount > 0
+            self.remember_titles([title])
+
+            if inserted:
+                logger.info(f"成功插入新闻: {title[:50]}...")
+            else:
+                # 每条重复新闻都会输出，只在DEBUG级别格式化
+                logger.opt(lazy=True).debug("新闻已存在，跳过: {}...", lambda: title[:50])
+            return inserted
             
         except Error as e:
             logger.error(f"插入新闻失败: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
     
+    def bulk_insert_news(self, items: List[Tuple[str, str, str, str]]) -> int:
+        """
+        批量插入新闻数据，单次请求、单个事务，标题已存在的行被忽略
+
+        Args:
+            items: (title, summary, importance, content) 元组列表
+
+        Returns:
+            int: 实际新插入的行数，失败返回0
+        """
+        if not items:
+            return 0
+
+        query = """
+        INSERT IGNORE INTO news (title, summary, importance, content)
+        VALUES (%s, %s, %s, %s)
+        """
+
+        try:
+            with self._cursor() as (_, cursor):
+                # executemany将多行合并为一条INSERT语句，自动提交下同样是原子的
+                cursor.executemany(query, items)
+                inserted = cursor.rowcount
+
+            # 无论新插入还是被忽略，这些标题现在都已存在
+            self.remember_titles(item[0] for item in items)
+            logger.info(f"成功批量插入 {inserted} 条新闻，{len(items) - inserted} 条已存在被跳过")
+            return inserted
+
+        except Error as e:
+            logger.error(f"批量插入新闻失败: {e}")
+            return 0
+    
     def get_latest_news(self, limit: int = 10) -> List[Dict[str, Any]]:
         """获取最新的新闻"""
+        query = """
+        SELECT id, title, summary, importance, content, created_at, updated_at
+        FROM news
+        ORDER BY created_at DESC
+        LIMIT %s
+        """
+
         try:
-            if not self.connection or not self.connection.is_connected():
-                if not self.connect():
-                    return []
-            
-            query = """
-            SELECT id, title, summary, importance, content, created_at, updated_at
-            FROM news
-            ORDER BY created_at DESC
-            LIMIT %s
-            """
-
-            self.cursor.execute(query, (limit,))
-            results = self.cursor.fetchall()
-
-            # 转换为字典格式
-            columns = ['id', 'title', 'summary', 'importance', 'content', 'created_at', 'updated_at']
-            news_list = []
-            for row in results:
-                news_dict = dict(zip(columns, row))
-                news_list.append(news_dict)
-            
-            return news_list
+            with self._cursor(dictionary=True) as (_, cursor):
+                cursor.execute(query, (limit,))
+                return cursor.fetchall()
             
         except Error as e:
             logger.error(f"获取新闻失败: {e}")
             return []
     
     def check_news_exists(self, title: str) -> bool:
-        """检查新闻是否已存在"""
-        try:
-            if not self.connection or not self.connection.is_connected():
-                if not self.connect():
-                    return False
+        """检查新闻是否已存在（LRU命中直接返回存在，否则查询数据库）"""
+        if self.is_known_title(title):
+            return True
+
+        query = "SELECT COUNT(*) FROM news WHERE title = %s"
 
-            query = "SELECT COUNT(*) FROM news WHERE title = %s"
-            self.cursor.execute(query, (title,))
-            count = self.cursor.fetchone()[0]
+        try:
+            with self._cursor() as (_, cursor):
+                cursor.execute(query, (title,))
+                count = cursor.fetchone()[0]
 
+            if count > 0:
+                self.remember_titles([title])
             return count > 0
 
         except Error as e:
@@ -122,26 +186,17 @@ class DatabaseManager:
 
     def get_today_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
         """获取今日的新闻总结"""
-        try:
-            if not self.connection or not self.connection.is_connected():
-                if not self.connect():
-                    return None
+        summary_title = f"每日新闻总结 - {date_str}"
+        query = """
+        SELECT id, title, summary, importance, content, created_at, updated_at
+        FROM news
+        WHERE title = %s
+        """
 
-            summary_title = f"每日新闻总结 - {date_str}"
-            query = """
-            SELECT id, title, summary, importance, content, created_at, updated_at
-            FROM news
-            WHERE title = %s
-            """
-
-            self.cursor.execute(query, (summary_title,))
-            result = self.cursor.fetchone()
-
-            if result:
-                columns = ['id', 'title', 'summary', 'importance', 'content', 'created_at', 'updated_at']
-                return dict(zip(columns, result))
-
-            return None
+        try:
+            with self._cursor(dictionary=True) as (_, cursor):
+                cursor.execute(query, (summary_title,))
+                return cursor.fetchone()
 
         except Error as e:
             logger.error(f"获取今日总结失败: {e}")
@@ -149,27 +204,21 @@ class DatabaseManager:
 
     def update_news_content(self, news_id: int, new_content: str) -> bool:
         """更新新闻内容"""
-        try:
-            if not self.connection or not self.connection.is_connected():
-                if not self.connect():
-                    return False
+        query = """
+        UPDATE news
+        SET content = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """
 
-            query = """
-            UPDATE news
-            SET content = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE id = %s
-            """
-
-            self.cursor.execute(query, (new_content, news_id))
-            self.connection.commit()
+        try:
+            with self._cursor() as (_, cursor):
+                cursor.execute(query, (new_content, news_id))
 
             logger.info(f"成功更新新闻内容，ID: {news_id}")
             return True
 
         except Error as e:
             logger.error(f"更新新闻内容失败: {e}")
-            if self.connection:
-                self.connection.rollback()
             return False
 
 
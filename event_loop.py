@@ -0,0 +1,44 @@
+"""
+后台事件循环模块
+
+异步HTTP连接池绑定在创建它的事件循环上，每次asyncio.run都会新建并关闭事件循环，
+导致连接无法复用。这里维护一个常驻后台线程中的事件循环，供同步代码提交协程
+"""
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时启动）后台事件循环"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="news-event-loop", daemon=True)
+            _thread.start()
+        return _loop
+
+
+def run_async(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """
+    在后台事件循环中执行协程并阻塞等待结果
+
+    Args:
+        coro: 要执行的协程
+        timeout: 最长等待秒数，None表示一直等待
+
+    Returns:
+        协程的返回值
+    """
+    loop = get_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("不能在后台事件循环线程中同步等待协程")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
@@ -0,0 +1,24 @@
+"""
+gunicorn配置（用于Render部署）
+
+启动命令: gunicorn -c gunicorn_conf.py web_main:app
+"""
+import os
+
+from config import settings
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+# 调度任务在独立子进程运行，不占用请求处理时间，这里只需覆盖慢请求
+timeout = 120
+# 关闭worker时要等待调度器子进程收尾（最多SHUTDOWN_GRACE_SECONDS + 5秒），需留出余量，否则worker会先被强制结束
+graceful_timeout = settings.shutdown_grace_seconds + 10
+accesslog = None
+
+
+def post_worker_init(worker):
+    """worker启动后配置日志"""
+    from log_setup import setup_logging
+
+    setup_logging()
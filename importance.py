@@ -0,0 +1,12 @@
+"""
+新闻重要性等级模块
+"""
+import sys
+
+# 重要性等级（驻留字符串，全局共用同一对象）
+IMPORTANCE_HIGH = sys.intern("高")
+IMPORTANCE_MEDIUM = sys.intern("中")
+IMPORTANCE_LOW = sys.intern("低")
+
+# 需要保存到数据库的重要性等级
+IMPORTANT_LEVELS = frozenset((IMPORTANCE_HIGH, IMPORTANCE_MEDIUM))
@@ -0,0 +1,38 @@
+"""
+日志配置模块
+"""
+import sys
+from loguru import logger
+from config import settings
+
+
+def setup_logging():
+    """设置日志配置"""
+    # 强制设置标准输出编码
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    if hasattr(sys.stderr, 'reconfigure'):
+        sys.stderr.reconfigure(encoding='utf-8')
+
+    # 移除默认处理器
+    logger.remove()
+    
+    # 添加控制台输出
+    logger.add(
+        sys.stdout,
+        level=settings.log_level,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        colorize=True,
+        enqueue=True
+    )
+    
+    # 添加文件输出（纯文本精简格式）
+    logger.add(
+        settings.log_file,
+        level=settings.log_level,
+        format="{time:YYYY-MM-DD HH:mm:ss}|{level}|{message}",
+        enqueue=True,
+        rotation="10 MB",
+        retention="30 days",
+        compression="zip"
+    )
@@ -23,7 +23,8 @@ except locale.Error:
         pass
 
 # 导入所有模块
-from config import DB_CONFIG, NEWS_API_URL, SCHEDULE_HOURS, LOG_LEVEL, LOG_FILE
+from config import settings
+from log_setup import setup_logging
 from database import test_database_connection, db_manager
 from news_fetcher import test_news_fetcher
 from ai_summarizer import test_ai_summarizer
@@ -31,37 +32,6 @@ from news_agent import test_news_agent
 from scheduler import news_scheduler
 
 
-def setup_logging():
-    """设置日志配置"""
-    # 强制设置标准输出编码
-    import sys
-    if hasattr(sys.stdout, 'reconfigure'):
-        sys.stdout.reconfigure(encoding='utf-8')
-    if hasattr(sys.stderr, 'reconfigure'):
-        sys.stderr.reconfigure(encoding='utf-8')
-
-    # 移除默认处理器
-    logger.remove()
-    
-    # 添加控制台输出
-    logger.add(
-        sys.stdout,
-        level=LOG_LEVEL,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        colorize=True
-    )
-    
-    # 添加文件输出
-    logger.add(
-        LOG_FILE,
-        level=LOG_LEVEL,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-        rotation="10 MB",
-        retention="30 days",
-        compression="zip"
-    )
-
-
 def print_banner():
     """打印启动横幅"""
     banner = """
@@ -80,11 +50,11 @@ def print_banner():
 def show_system_info():
     """显示系统信息"""
     logger.info("📋 系统配置信息:")
-    logger.info(f"   - 数据库: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
-    logger.info(f"   - 新闻API: {NEWS_API_URL}")
-    logger.info(f"   - 执行间隔: 每 {SCHEDULE_HOURS} 小时")
-    logger.info(f"   - 日志级别: {LOG_LEVEL}")
-    logger.info(f"   - 日志文件: {LOG_FILE}")
+    logger.info(f"   - 数据库: {settings.db_host}:{settings.db_port}/{settings.db_name}")
+    logger.info(f"   - 新闻API: {settings.news_api_url}")
+    logger.info(f"   - 执行间隔: 每 {settings.schedule_hours} 小时")
+    logger.info(f"   - 日志级别: {settings.log_level}")
+    logger.info(f"   - 日志文件: {settings.log_file}")
     logger.info(f"   - 当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 
@@ -140,70 +110,6 @@ def start_scheduler(run_immediately=False):
     news_scheduler.run_forever(run_immediately=run_immediately)
 
 
-def start_web_server():
-    """启动Web服务器模式（用于Render部署）"""
-    import os
-    import threading
-    from http.server import HTTPServer, BaseHTTPRequestHandler
-    import json
-
-    # 启动后台调度器
-    def run_scheduler():
-        try:
-            logger.info("启动后台新闻调度器...")
-            news_scheduler.run_forever(run_immediately=True)
-        except Exception as e:
-            logger.error(f"调度器错误: {e}")
-
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
-
-    # 简单的HTTP处理器
-    class SimpleHandler(BaseHTTPRequestHandler):
-        def do_GET(self):
-            if self.path == '/health':
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {
-                    "status": "healthy",
-                    "service": "News Agent System",
-                    "timestamp": datetime.now().isoformat()
-                }
-                self.wfile.write(json.dumps(response).encode())
-            elif self.path == '/':
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {
-                    "service": "News Agent System",
-                    "status": "running",
-                    "description": "基于LangChain + LangGraph的智能新闻分析系统",
-                    "timestamp": datetime.now().isoformat()
-                }
-                self.wfile.write(json.dumps(response).encode())
-            else:
-                self.send_response(404)
-                self.end_headers()
-
-        def log_message(self, format, *args):
-            # 禁用默认日志，使用我们的logger
-            logger.info(f"HTTP {format % args}")
-
-    # 启动HTTP服务器
-    port = int(os.environ.get('PORT', 8000))
-    server = HTTPServer(('0.0.0.0', port), SimpleHandler)
-    logger.info(f"🌐 Web服务器启动在端口 {port}")
-    logger.info("📡 健康检查端点: /health")
-    logger.info("🏠 主页端点: /")
-
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        logger.info("👋 Web服务器关闭")
-        server.shutdown()
-
-
 def main():
     """主函数"""
     # 设置日志
@@ -255,7 +161,8 @@ def main():
         elif args.web:
             # Web服务器模式
             logger.info("🌐 启动Web服务器模式...")
-            start_web_server()
+            from web_main import run_web_server
+            run_web_server()
             
         else:
             # 默认行为：显示帮助
@@ -1,187 +1,211 @@
 """
 新闻代理核心 - 使用LangGraph
 """
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from typing_extensions import Annotated, TypedDict
+from typing_extensions import Annotated
 from loguru import logger
 import json
 from datetime import datetime
 
 # 导入自定义模块
 from news_fetcher import news_fetcher
-from ai_summarizer import ai_summarizer
+from ai_summarizer import get_ai_summarizer
 from database import db_manager
+from importance import IMPORTANCE_HIGH, IMPORTANCE_LOW
+from config import settings
 
 
-class NewsAgentState(TypedDict):
+@dataclass(slots=True)
+class NewsAgentState:
     """新闻代理状态"""
-    messages: Annotated[list, add_messages]
-    raw_news: List[Dict[str, str]]
-    important_news: List[Dict[str, Any]]
-    final_summary: str
-    saved_count: int
-    error: str
+    messages: Annotated[list, add_messages] = field(default_factory=list)
+    raw_news: List[Dict[str, str]] = field(default_factory=list)
+    important_news: List[Dict[str, Any]] = field(default_factory=list)
+    final_summary: str = ""
+    run_ts: datetime = field(default_factory=datetime.now)
+    summary_date: str = ""
+    today_summary: Optional[Dict[str, Any]] = None
+    saved_count: int = 0
+    error: str = ""
 
 
 class NewsAgent:
     """新闻代理系统"""
     
     def __init__(self):
-        self.graph = self._create_graph()
+        # 网络/数据库IO线程池，与LLM调用重叠执行（驱动在等待IO时释放GIL）
+        self.io_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="news-io")
+        self._graph = None
+    
+    @property
+    def graph(self):
+        """LangGraph工作流（仅在启用USE_LANGGRAPH或调试时才编译）"""
+        if self._graph is None:
+            self._graph = self._create_graph()
+        return self._graph
+    
+    def _fetch_news_node(self, state: NewsAgentState) -> NewsAgentState:
+        """获取新闻节点"""
+        logger.info("🔄 开始获取新闻...")
+
+        try:
+            # 获取新闻的同时建立数据库连接池，后续节点无需等待握手
+            self.io_executor.submit(db_manager.connect)
+            raw_news = news_fetcher.get_processed_news()
+            if raw_news:
+                logger.info(f"✅ 成功获取 {len(raw_news)} 条新闻")
+                state.raw_news = raw_news
+                state.messages.append({"role": "system", "content": f"成功获取 {len(raw_news)} 条新闻"})
+            else:
+                logger.warning("⚠️ 未获取到新闻数据")
+                state.error = "未获取到新闻数据"
+                state.messages.append({"role": "system", "content": "未获取到新闻数据"})
+
+        except Exception as e:
+            logger.error(f"❌ 获取新闻失败: {e}")
+            state.error = f"获取新闻失败: {e}"
+            state.messages.append({"role": "system", "content": f"获取新闻失败: {e}"})
+
+        return state
+
+    def _analyze_news_node(self, state: NewsAgentState) -> NewsAgentState:
+        """分析新闻重要性节点"""
+        logger.info("🤖 开始AI分析新闻重要性...")
+
+        try:
+            if not state.raw_news:
+                state.error = "没有新闻数据可供分析"
+                return state
+
+            important_news = get_ai_summarizer().filter_important_news(state.raw_news)
+            state.important_news = important_news
+
+            if important_news:
+                logger.info(f"✅ 发现 {len(important_news)} 条重要新闻")
+                state.messages.append({"role": "system", "content": f"AI分析完成，发现 {len(important_news)} 条重要新闻"})
+            else:
+                logger.info("ℹ️ 未发现重要新闻")
+                state.messages.append({"role": "system", "content": "AI分析完成，未发现重要新闻"})
+
+        except Exception as e:
+            logger.error(f"❌ AI分析失败: {e}")
+            state.error = f"AI分析失败: {e}"
+            state.messages.append({"role": "system", "content": f"AI分析失败: {e}"})
+
+        return state
+
+    def _create_summary_node(self, state: NewsAgentState) -> NewsAgentState:
+        """创建总结节点"""
+        logger.info("📝 开始创建新闻总结...")
+
+        try:
+            important_news = state.important_news
+            # 生成总结期间并行查询今日已有总结，供保存节点决定合并还是插入
+            today_summary_future = None
+            if important_news:
+                today_summary_future = self.io_executor.submit(db_manager.get_today_summary, state.summary_date)
+            final_summary = get_ai_summarizer().create_final_summary(important_news)
+            state.final_summary = final_summary
+            state.today_summary = today_summary_future.result() if today_summary_future else None
+
+            logger.info("✅ 新闻总结创建完成")
+            state.messages.append({"role": "system", "content": "新闻总结创建完成"})
+
+        except Exception as e:
+            logger.error(f"❌ 创建总结失败: {e}")
+            state.error = f"创建总结失败: {e}"
+            state.final_summary = "总结创建失败"
+            state.messages.append({"role": "system", "content": f"创建总结失败: {e}"})
+
+        return state
+
+    def _save_to_database_node(self, state: NewsAgentState) -> NewsAgentState:
+        """保存到数据库节点"""
+        logger.info("💾 开始保存重要新闻到数据库...")
+
+        saved_count = 0
+        try:
+            important_news = state.important_news
+            final_summary = state.final_summary
+
+            # 重要新闻行，最近已入库的标题直接跳过，其余已存在的标题由唯一索引忽略
+            rows = [
+                (
+                    news.get("original_title", ""),
+                    news.get("summary", ""),
+                    news.get("importance", IMPORTANCE_LOW),
+                    news.get("original_content", "")
+                )
+                for news in important_news
+                if not db_manager.is_known_title(news.get("original_title", ""))
+            ]
+            if len(rows) < len(important_news):
+                logger.info(f"跳过 {len(important_news) - len(rows)} 条近期已入库的新闻")
+
+            # 智能保存每日总结
+            if final_summary and final_summary != "今日暂无重要新闻。":
+                today = state.summary_date
+
+                # 今日已有总结（已在创建总结节点中查询）
+                existing_summary = state.today_summary
+
+                if existing_summary:
+                    # 如果已有今日总结，合并新旧总结
+                    logger.info("发现今日已有总结，正在合并新内容...")
+                    merged_summary = get_ai_summarizer().merge_summaries(
+                        existing_summary['content'],
+                        final_summary,
+                        important_news
+                    )
+
+                    # 更新数据库中的总结
+                    if db_manager.update_news_content(existing_summary['id'], merged_summary):
+                        logger.info("✅ 成功更新今日新闻总结")
+                    else:
+                        logger.error("❌ 更新今日新闻总结失败")
+                else:
+                    # 如果没有今日总结，与重要新闻一起批量插入
+                    summary_title = f"每日新闻总结 - {today}"
+                    rows.append((summary_title, "AI生成的每日新闻总结", IMPORTANCE_HIGH, final_summary))
+
+            # 一次请求写入所有新行
+            saved_count += db_manager.bulk_insert_news(rows)
+
+            state.saved_count = saved_count
+            logger.info(f"✅ 成功保存 {saved_count} 条记录到数据库")
+            state.messages.append({"role": "system", "content": f"成功保存 {saved_count} 条记录到数据库"})
+
+        except Exception as e:
+            logger.error(f"❌ 保存到数据库失败: {e}")
+            state.error = f"保存到数据库失败: {e}"
+            state.saved_count = saved_count
+            state.messages.append({"role": "system", "content": f"保存到数据库失败: {e}"})
+
+        return state
+
+    def _should_continue(self, state: NewsAgentState) -> str:
+        """决定是否继续执行"""
+        if state.error:
+            return "end"
+        if not state.raw_news:
+            return "end"
+        return "continue"
     
     def _create_graph(self) -> StateGraph:
         """创建LangGraph工作流"""
         
-        # 定义节点函数
-        def fetch_news_node(state: NewsAgentState) -> NewsAgentState:
-            """获取新闻节点"""
-            logger.info("🔄 开始获取新闻...")
-            
-            try:
-                raw_news = news_fetcher.get_processed_news()
-                if raw_news:
-                    logger.info(f"✅ 成功获取 {len(raw_news)} 条新闻")
-                    state["raw_news"] = raw_news
-                    state["messages"].append({"role": "system", "content": f"成功获取 {len(raw_news)} 条新闻"})
-                else:
-                    logger.warning("⚠️ 未获取到新闻数据")
-                    state["error"] = "未获取到新闻数据"
-                    state["messages"].append({"role": "system", "content": "未获取到新闻数据"})
-                    
-            except Exception as e:
-                logger.error(f"❌ 获取新闻失败: {e}")
-                state["error"] = f"获取新闻失败: {e}"
-                state["messages"].append({"role": "system", "content": f"获取新闻失败: {e}"})
-            
-            return state
-        
-        def analyze_news_node(state: NewsAgentState) -> NewsAgentState:
-            """分析新闻重要性节点"""
-            logger.info("🤖 开始AI分析新闻重要性...")
-            
-            try:
-                if not state.get("raw_news"):
-                    state["error"] = "没有新闻数据可供分析"
-                    return state
-                
-                important_news = ai_summarizer.filter_important_news(state["raw_news"])
-                state["important_news"] = important_news
-                
-                if important_news:
-                    logger.info(f"✅ 发现 {len(important_news)} 条重要新闻")
-                    state["messages"].append({"role": "system", "content": f"AI分析完成，发现 {len(important_news)} 条重要新闻"})
-                else:
-                    logger.info("ℹ️ 未发现重要新闻")
-                    state["messages"].append({"role": "system", "content": "AI分析完成，未发现重要新闻"})
-                    
-            except Exception as e:
-                logger.error(f"❌ AI分析失败: {e}")
-                state["error"] = f"AI分析失败: {e}"
-                state["messages"].append({"role": "system", "content": f"AI分析失败: {e}"})
-            
-            return state
-        
-        def create_summary_node(state: NewsAgentState) -> NewsAgentState:
-            """创建总结节点"""
-            logger.info("📝 开始创建新闻总结...")
-            
-            try:
-                important_news = state.get("important_news", [])
-                final_summary = ai_summarizer.create_final_summary(important_news)
-                state["final_summary"] = final_summary
-                
-                logger.info("✅ 新闻总结创建完成")
-                state["messages"].append({"role": "system", "content": "新闻总结创建完成"})
-                
-            except Exception as e:
-                logger.error(f"❌ 创建总结失败: {e}")
-                state["error"] = f"创建总结失败: {e}"
-                state["final_summary"] = "总结创建失败"
-                state["messages"].append({"role": "system", "content": f"创建总结失败: {e}"})
-            
-            return state
-        
-        def save_to_database_node(state: NewsAgentState) -> NewsAgentState:
-            """保存到数据库节点"""
-            logger.info("💾 开始保存重要新闻到数据库...")
-            
-            saved_count = 0
-            try:
-                important_news = state.get("important_news", [])
-                final_summary = state.get("final_summary", "")
-                
-                # 保存重要新闻
-                for news in important_news:
-                    title = news.get("original_title", "")
-                    summary = news.get("summary", "")
-                    content = news.get("original_content", "")
-                    importance = news.get("importance", "低")
-
-                    # 检查是否已存在
-                    if not db_manager.check_news_exists(title):
-                        if db_manager.insert_news(title, summary, content, importance):
-                            saved_count += 1
-                    else:
-                        logger.info(f"新闻已存在，跳过: {title[:50]}...")
-                
-                # 智能保存每日总结
-                if final_summary and final_summary != "今日暂无重要新闻。":
-                    today = datetime.now().strftime('%Y-%m-%d')
-
-                    # 检查今日是否已有总结
-                    existing_summary = db_manager.get_today_summary(today)
-
-                    if existing_summary:
-                        # 如果已有今日总结，合并新旧总结
-                        logger.info("发现今日已有总结，正在合并新内容...")
-                        merged_summary = ai_summarizer.merge_summaries(
-                            existing_summary['content'],
-                            final_summary,
-                            important_news
-                        )
-
-                        # 更新数据库中的总结
-                        if db_manager.update_news_content(existing_summary['id'], merged_summary):
-                            logger.info("✅ 成功更新今日新闻总结")
-                        else:
-                            logger.error("❌ 更新今日新闻总结失败")
-                    else:
-                        # 如果没有今日总结，插入新的总结
-                        summary_title = f"每日新闻总结 - {today}"
-                        if db_manager.insert_news(summary_title, "AI生成的每日新闻总结", final_summary, "高"):
-                            saved_count += 1
-                            logger.info("✅ 成功创建今日新闻总结")
-                
-                state["saved_count"] = saved_count
-                logger.info(f"✅ 成功保存 {saved_count} 条记录到数据库")
-                state["messages"].append({"role": "system", "content": f"成功保存 {saved_count} 条记录到数据库"})
-                
-            except Exception as e:
-                logger.error(f"❌ 保存到数据库失败: {e}")
-                state["error"] = f"保存到数据库失败: {e}"
-                state["saved_count"] = saved_count
-                state["messages"].append({"role": "system", "content": f"保存到数据库失败: {e}"})
-            
-            return state
-        
-        def should_continue(state: NewsAgentState) -> str:
-            """决定是否继续执行"""
-            if state.get("error"):
-                return "end"
-            if not state.get("raw_news"):
-                return "end"
-            return "continue"
-        
         # 创建状态图
         workflow = StateGraph(NewsAgentState)
         
         # 添加节点
-        workflow.add_node("fetch_news", fetch_news_node)
-        workflow.add_node("analyze_news", analyze_news_node)
-        workflow.add_node("create_summary", create_summary_node)
-        workflow.add_node("save_to_database", save_to_database_node)
+        workflow.add_node("fetch_news", self._fetch_news_node)
+        workflow.add_node("analyze_news", self._analyze_news_node)
+        workflow.add_node("create_summary", self._create_summary_node)
+        workflow.add_node("save_to_database", self._save_to_database_node)
         
         # 设置入口点
         workflow.set_entry_point("fetch_news")
@@ -189,7 +213,7 @@ class NewsAgent:
         # 添加条件边
         workflow.add_conditional_edges(
             "fetch_news",
-            should_continue,
+            self._should_continue,
             {
                 "continue": "analyze_news",
                 "end": END
@@ -207,19 +231,29 @@ class NewsAgent:
         """运行新闻代理"""
         logger.info("🚀 启动新闻代理系统...")
         
+        # 本次运行的时间，各节点共用（每日总结的日期等）
+        run_ts = datetime.now()
+        
         # 初始状态
         initial_state = NewsAgentState(
             messages=[{"role": "system", "content": "新闻代理系统启动"}],
             raw_news=[],
             important_news=[],
             final_summary="",
+            run_ts=run_ts,
+            summary_date=run_ts.strftime('%Y-%m-%d'),
+            today_summary=None,
             saved_count=0,
             error=""
         )
         
         try:
             # 运行工作流
-            final_state = self.graph.invoke(initial_state)
+            if settings.use_langgraph:
+                # LangGraph以字典形式返回最终状态
+                final_state = NewsAgentState(**self.graph.invoke(initial_state))
+            else:
+                final_state = self._run_pipeline(initial_state)
             
             # 生成运行报告
             report = self._generate_report(final_state)
@@ -235,17 +269,26 @@ class NewsAgent:
                 "timestamp": datetime.now().isoformat()
             }
     
+    def _run_pipeline(self, state: NewsAgentState) -> NewsAgentState:
+        """按顺序直接执行各节点，与LangGraph工作流的行为一致"""
+        state = self._fetch_news_node(state)
+        if self._should_continue(state) == "end":
+            return state
+        state = self._analyze_news_node(state)
+        state = self._create_summary_node(state)
+        return self._save_to_database_node(state)
+    
     def _generate_report(self, final_state: NewsAgentState) -> Dict[str, Any]:
         """生成运行报告"""
         return {
-            "success": not bool(final_state.get("error")),
+            "success": not bool(final_state.error),
             "timestamp": datetime.now().isoformat(),
-            "raw_news_count": len(final_state.get("raw_news", [])),
-            "important_news_count": len(final_state.get("important_news", [])),
-            "saved_count": final_state.get("saved_count", 0),
-            "final_summary": final_state.get("final_summary", ""),
-            "error": final_state.get("error", ""),
-            "messages": final_state.get("messages", [])
+            "raw_news_count": len(final_state.raw_news),
+            "important_news_count": len(final_state.important_news),
+            "saved_count": final_state.saved_count,
+            "final_summary": final_state.final_summary,
+            "error": final_state.error,
+            "messages": final_state.messages
         }
 
 
@@ -1,22 +1,63 @@
 """
 新闻获取模块
 """
-import requests
+import atexit
 from typing import List, Dict, Any, Optional
+import httpx
+import orjson
 from loguru import logger
-from config import NEWS_API_URL
-import json
+from config import settings
+from event_loop import run_async
+
+
+# 新闻接口的请求头
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    # br需要安装brotli，httpx会自动解压
+    'Accept-Encoding': 'br, gzip, deflate',
+}
+
+# 依次尝试的标题、内容字段
+TITLE_FIELDS = ('title', 'headline', 'subject', 'name', 'summary', 'app_msg')
+CONTENT_FIELDS = ('content', 'body', 'text', 'description', 'detail', 'article', 'app_msg')
 
 
 class NewsFetcher:
     """新闻获取器"""
     
     def __init__(self):
-        self.api_url = NEWS_API_URL
+        self.api_url = settings.news_api_url
+        # 长连接复用，定时任务多次运行之间不再重复TCP/TLS握手
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers=REQUEST_HEADERS,
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=4)
+        )
+        atexit.register(self.close)
+
+    def close(self):
+        """关闭HTTP连接池"""
+        try:
+            if not self._client.is_closed:
+                run_async(self._client.aclose(), timeout=5)
+        except Exception as e:
+            logger.debug(f"关闭新闻接口连接池失败: {e}")
     
     def fetch_latest_news(self) -> Optional[List[Dict[str, Any]]]:
         """
-        从API获取最新新闻
+        从API获取最新新闻（同步封装，在后台事件循环中执行a_fetch_latest_news）
+        
+        Returns:
+            List[Dict[str, Any]]: 新闻列表，每个新闻包含标题、内容等信息
+        """
+        return run_async(self.a_fetch_latest_news())
+    
+    async def a_fetch_latest_news(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        从API异步获取最新新闻
         
         Returns:
             List[Dict[str, Any]]: 新闻列表，每个新闻包含标题、内容等信息
@@ -24,28 +65,18 @@ class NewsFetcher:
         try:
             logger.info(f"开始从 {self.api_url} 获取新闻...")
 
-            # 每次请求时创建新的Session
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'application/json, text/plain, */*',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'close'
-            })
-
-            response = session.get(self.api_url, timeout=30)
+            response = await self._client.get(self.api_url)
             response.raise_for_status()  # 如果状态码不是200会抛出异常
             
             # 尝试解析JSON响应
             try:
-                news_data = response.json()
-            except json.JSONDecodeError:
+                news_data = orjson.loads(response.content)
+            except orjson.JSONDecodeError:
                 # 如果不是JSON格式，尝试解析文本
                 logger.warning("响应不是JSON格式，尝试解析文本...")
                 news_data = response.text
             
-            logger.info(f"成功获取新闻数据，响应长度: {len(str(news_data))}")
+            logger.info(f"成功获取新闻数据，响应长度: {len(response.content)} 字节")
             
             # 处理不同的响应格式
             if isinstance(news_data, list):
@@ -77,7 +108,7 @@ class NewsFetcher:
                 logger.warning(f"收到文本响应: {str(news_data)[:200]}...")
                 return [{"title": "API响应", "content": str(news_data)}]
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"获取新闻失败 - 网络错误: {e}")
             return None
         except Exception as e:
@@ -94,40 +125,29 @@ class NewsFetcher:
         Returns:
             Dict[str, str]: 标准化的新闻数据，包含title, content字段
         """
-        parsed_news = {
-            'title': '',
-            'content': ''
-        }
-        
-        # 尝试提取标题
-        title_fields = ['title', 'headline', 'subject', 'name', 'summary', 'app_msg']
-        for field in title_fields:
-            if field in news_item and news_item[field]:
-                content_text = str(news_item[field]).strip()
-                # 如果是app_msg，提取第一行作为标题
-                if field == 'app_msg':
-                    lines = content_text.split('\n')
-                    parsed_news['title'] = lines[0].strip()
-                else:
-                    parsed_news['title'] = content_text
-                break
-
-        # 尝试提取内容
-        content_fields = ['content', 'body', 'text', 'description', 'detail', 'article', 'app_msg']
-        for field in content_fields:
-            if field in news_item and news_item[field]:
-                parsed_news['content'] = str(news_item[field]).strip()
-                break
+        # 取第一个非空字段，app_msg作为标题时只取第一行
+        title_field = next((field for field in TITLE_FIELDS if news_item.get(field)), None)
+        title = ''
+        if title_field is not None:
+            title = str(news_item[title_field]).strip()
+            if title_field == 'app_msg':
+                title = title.partition('\n')[0].strip()
+
+        content_field = next((field for field in CONTENT_FIELDS if news_item.get(field)), None)
+        content = str(news_item[content_field]).strip() if content_field is not None else ''
         
         # 如果没有找到标题，使用内容的前50个字符作为标题
-        if not parsed_news['title'] and parsed_news['content']:
-            parsed_news['title'] = parsed_news['content'][:50] + "..."
+        if not title and content:
+            title = content[:50] + "..."
         
         # 如果没有找到内容，将整个item转为字符串
-        if not parsed_news['content']:
-            parsed_news['content'] = str(news_item)
+        if not content:
+            content = str(news_item)
         
-        return parsed_news
+        return {
+            'title': title,
+            'content': content
+        }
     
     def get_processed_news(self) -> List[Dict[str, str]]:
         """
@@ -0,0 +1,102 @@
+"""
+新闻预筛选模块 - 在调用LLM前用本地规则识别明显的低重要性新闻
+"""
+import re
+from typing import Dict, Any, List, Optional
+from loguru import logger
+from importance import IMPORTANCE_LOW
+
+
+# 明显与金融市场无关的低重要性内容
+LOW_IMPORTANCE_PATTERNS = [
+    re.compile(r'天气(预报|晴朗|很好|不错|转凉|转暖)|阳光明媚|气温.{0,4}(升|降|度)|(小|中|大|暴)雨'),
+    re.compile(r'星座|运势|生肖'),
+    re.compile(r'综艺|电视剧|电影票房|明星.{0,4}(恋情|婚|绯闻)|八卦'),
+    re.compile(r'美食|菜谱|食谱|减肥|养生'),
+]
+
+# 出现任一市场相关词时不做规则判断，交给LLM分析
+MARKET_KEYWORDS = re.compile(
+    r'比特币|以太坊|加密|币|区块链|ETF|SEC|CFTC|美联储|Fed|利率|加息|降息|通胀|CPI|GDP|'
+    r'股|指数|纳斯达克|标普|道琼斯|财报|营收|融资|交易所|美元|关税|制裁|监管|收购|'
+    r'BTC|ETH|DeFi|NFT|Web3',
+    re.IGNORECASE
+)
+
+# 天气、灾害等内容伴随生产或供应影响时可能影响市场（如"暴雨致工厂停产"），同样交给LLM分析
+DISRUPTION_KEYWORDS = re.compile(
+    r'停产|减产|停工|停运|停电|断电|供应|短缺|价格|涨价|期货|原油|粮食|港口|航运|物流|受灾|损失|保险'
+)
+
+# 低重要性新闻的原型文本，用于嵌入相似度判断
+LOW_IMPORTANCE_PROTOTYPES = [
+    "今天天气很好，阳光明媚。",
+    "某小型项目发布了新版本，修复了一些小bug，提升了用户体验。",
+    "社区举办Meme币娱乐活动，网友纷纷参与。",
+    "个人投资者分享自己的交易心得和小额操作。",
+    "公司发布常规人事变动和日常运营公告。",
+]
+
+
+class NewsPrefilter:
+    """
+    新闻预筛选器
+
+    命中规则（且不含市场关键词）或与低重要性原型的嵌入相似度超过阈值的新闻，
+    直接判定为低重要性，不再调用LLM
+    """
+
+    def __init__(self, enabled: bool = True, embedding_model: str = "", threshold: float = 0.8):
+        self.enabled = enabled
+        self.threshold = threshold
+        self._model = None
+        self._prototypes = None
+
+        if enabled and embedding_model:
+            try:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"加载预筛选嵌入模型: {embedding_model}")
+                self._model = SentenceTransformer(embedding_model)
+                self._prototypes = self._model.encode(LOW_IMPORTANCE_PROTOTYPES, normalize_embeddings=True)
+            except Exception as e:
+                logger.error(f"预筛选嵌入模型加载失败，仅使用规则判断: {e}")
+                self._model = None
+
+    def _match_rules(self, content: str) -> bool:
+        """规则判断是否为低重要性新闻"""
+        if MARKET_KEYWORDS.search(content) or DISRUPTION_KEYWORDS.search(content):
+            return False
+        return any(pattern.search(content) for pattern in LOW_IMPORTANCE_PATTERNS)
+
+    def classify(self, contents: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        预筛选新闻
+
+        Args:
+            contents: 新闻内容列表
+
+        Returns:
+            List: 与输入一一对应，判定为低重要性的返回分析结果，不确定的返回None
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(contents)
+        if not self.enabled:
+            return results
+
+        uncertain = []
+        for i, content in enumerate(contents):
+            if self._match_rules(content):
+                results[i] = {'importance': IMPORTANCE_LOW, 'summary': '', 'keywords': ''}
+            else:
+                uncertain.append(i)
+
+        if self._model is not None and uncertain:
+            vectors = self._model.encode([contents[i] for i in uncertain], normalize_embeddings=True)
+            similarities = (vectors @ self._prototypes.T).max(axis=1)
+            for i, similarity in zip(uncertain, similarities):
+                if similarity > self.threshold:
+                    results[i] = {'importance': IMPORTANCE_LOW, 'summary': '', 'keywords': ''}
+
+        filtered = sum(1 for result in results if result is not None)
+        if filtered:
+            logger.info(f"预筛选判定 {filtered} 条新闻为低重要性，跳过LLM分析")
+        return results
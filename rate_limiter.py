@@ -0,0 +1,136 @@
+"""
+LLM请求限流模块
+"""
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Mapping, Optional
+from loguru import logger
+
+
+# 形如 "1s"、"6m0s"、"20ms" 的时长
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """解析OpenAI限流头中的时长，返回秒数"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    从429响应头中解析需要等待的秒数
+
+    依次查看 retry-after-ms、retry-after、x-ratelimit-reset-requests、x-ratelimit-reset-tokens
+    """
+    if not headers:
+        return None
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+
+    waits = []
+    for name in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+        value = headers.get(name)
+        if value:
+            seconds = _parse_duration(value)
+            if seconds is not None:
+                waits.append(seconds)
+    return max(waits) if waits else None
+
+
+class RateLimiter:
+    """
+    请求数 + token数双桶限流器
+
+    每次请求前调用acquire预先扣减额度，额度不足时异步等待，避免集中发送后触发429；
+    遇到429时速率降低20%，请求成功后速率翻倍恢复（不超过配置上限）
+    """
+
+    MIN_RATE_SCALE = 0.1
+
+    def __init__(self, requests_per_min: int, tokens_per_min: int):
+        self.requests_per_min = requests_per_min
+        self.tokens_per_min = tokens_per_min
+        self.rate_scale = 1.0
+
+        self._available_requests = float(requests_per_min)
+        self._available_tokens = float(tokens_per_min)
+        self._last_update = time.monotonic()
+        self._blocked_until = 0.0
+        # 只保护计数器的读写，不跨越await，因此可以在多个事件循环/线程间共享
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """按经过的时间补充额度"""
+        elapsed = now - self._last_update
+        self._last_update = now
+        request_capacity = self.requests_per_min * self.rate_scale
+        token_capacity = self.tokens_per_min * self.rate_scale
+        self._available_requests = min(
+            request_capacity, self._available_requests + elapsed * request_capacity / 60
+        )
+        self._available_tokens = min(
+            token_capacity, self._available_tokens + elapsed * token_capacity / 60
+        )
+
+    def _try_acquire(self, tokens: int) -> float:
+        """尝试扣减额度，成功返回0，否则返回建议等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            self._refill(now)
+            # 单次请求不能超过桶容量，否则永远无法满足
+            tokens = min(tokens, self.tokens_per_min * self.rate_scale)
+            if self._available_requests >= 1 and self._available_tokens >= tokens:
+                self._available_requests -= 1
+                self._available_tokens -= tokens
+                return 0.0
+
+            request_wait = (1 - self._available_requests) * 60 / (self.requests_per_min * self.rate_scale)
+            token_wait = (tokens - self._available_tokens) * 60 / (self.tokens_per_min * self.rate_scale)
+            return max(request_wait, token_wait, 0.0)
+
+    async def acquire(self, tokens: int):
+        """等待直到有足够额度发送一次请求"""
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            # 每秒至少重新检查一次，速率恢复后可以尽快放行
+            await asyncio.sleep(min(wait, 1.0))
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """收到429后降低速率，并在Retry-After期间暂停发送"""
+        with self._lock:
+            self.rate_scale = max(self.rate_scale * 0.8, self.MIN_RATE_SCALE)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        logger.warning(f"触发LLM限流，速率降至 {self.rate_scale:.0%}，等待 {retry_after or 0:.1f} 秒")
+
+    def on_success(self):
+        """请求成功后逐步恢复速率"""
+        if self.rate_scale < 1.0:
+            with self._lock:
+                self.rate_scale = min(self.rate_scale * 2, 1.0)
+
+    def record_error(self, error: Any):
+        """如果异常为429限流错误则调整速率"""
+        from openai import RateLimitError
+
+        if isinstance(error, RateLimitError):
+            response = getattr(error, 'response', None)
+            self.on_rate_limited(parse_retry_after(getattr(response, 'headers', None)))
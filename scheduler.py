@@ -1,17 +1,16 @@
 """
 定时任务调度模块
 """
-import schedule
-import time
 import threading
+import time
 from datetime import datetime, timedelta
 from loguru import logger
-from typing import Optional
+from typing import Callable, Optional
 import signal
 import sys
 
 from news_agent import news_agent
-from config import SCHEDULE_HOURS
+from config import settings
 
 
 class NewsScheduler:
@@ -19,23 +18,65 @@ class NewsScheduler:
     
     def __init__(self):
         self.is_running = False
-        self.scheduler_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
-        
-        # 设置信号处理器，用于优雅关闭
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # 常驻的任务线程，首次执行任务时创建，之后每次任务都复用
+        self.job_thread: Optional[threading.Thread] = None
+        self._job_requested = threading.Event()
+        # 每次任务开始/结束时调用（如向Web进程汇报任务状态），结束回调的参数为运行报告
+        self.on_job_start: Optional[Callable[[], None]] = None
+        self.on_job_done: Optional[Callable[[Optional[dict]], None]] = None
+        # 只有一个固定周期的任务，直接用单调时钟记录下次执行时间（None表示未设置）
+        self._period = settings.schedule_hours * 3600
+        self._next_run: Optional[float] = None
+        # 当前没有任务在执行时处于设置状态，stop()据此有限时间地等待任务收尾
+        self._current_job_done = threading.Event()
+        self._current_job_done.set()
+        # 调度器运行期间替换掉的原信号处理器，stop()时恢复
+        self._previous_handlers: dict = {}
+        # 本次运行中首次收到的停止信号，同一信号再次到达时立即退出
+        self._received_signal: Optional[int] = None
+    
+    def _install_signal_handlers(self):
+        """调度器运行期间接管SIGINT/SIGTERM（只能在主线程中设置，已被忽略的信号保持忽略）"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._received_signal = None
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            if signal.getsignal(signum) is signal.SIG_IGN:
+                continue
+            self._previous_handlers[signum] = signal.signal(signum, self._signal_handler)
+    
+    def _restore_signal_handlers(self):
+        """恢复调度器启动前的信号处理器"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_handlers.clear()
     
     def _signal_handler(self, signum, frame):
-        """信号处理器"""
-        logger.info(f"收到信号 {signum}，准备关闭调度器...")
-        self.stop()
-        sys.exit(0)
+        """信号处理器：首次收到时通知调度循环退出，由调用方按顺序完成关闭；同一信号再次收到时立即退出"""
+        if signum == self._received_signal:
+            logger.warning(f"再次收到信号 {signum}，立即退出")
+            sys.exit(1)
+        if self._received_signal is not None:
+            # 如Ctrl+C后父进程又发送SIGTERM，仍按正常流程等待任务完成
+            logger.info(f"收到信号 {signum}，调度器已在关闭中")
+            return
+        self._received_signal = signum
+        logger.info(f"收到信号 {signum}，当前任务完成后关闭调度器（再次发送同一信号立即退出）...")
+        self.stop_event.set()
+        self.is_running = False
     
-    def run_news_agent_job(self):
-        """执行新闻代理任务"""
+    def run_news_agent_job(self) -> Optional[dict]:
+        """执行新闻代理任务，返回运行报告（异常时返回None）"""
         logger.info("⏰ 定时任务触发，开始执行新闻代理...")
         
+        report = None
+        # 由_start_job启动时事件已清除，这里覆盖run_once的直接调用
+        self._current_job_done.clear()
+        if self.on_job_start is not None:
+            self.on_job_start()
         try:
             start_time = datetime.now()
             report = news_agent.run()
@@ -55,6 +96,11 @@ class NewsScheduler:
                 
         except Exception as e:
             logger.error(f"❌ 定时任务执行异常: {e}")
+        finally:
+            self._current_job_done.set()
+            if self.on_job_done is not None:
+                self.on_job_done(report)
+        return report
     
     def _log_execution_result(self, report: dict, duration: float):
         """记录执行结果到日志"""
@@ -71,100 +117,146 @@ class NewsScheduler:
     
     def setup_schedule(self):
         """设置定时任务"""
-        # 清除现有任务
-        schedule.clear()
-        
-        # 设置每6小时执行一次
-        schedule.every(SCHEDULE_HOURS).hours.do(self.run_news_agent_job)
+        # 设置每6小时执行一次（从现在开始计时）
+        self._next_run = time.monotonic() + self._period
         
-        logger.info(f"⏱️ 定时任务已设置: 每 {SCHEDULE_HOURS} 小时执行一次")
+        logger.info(f"⏱️ 定时任务已设置: 每 {settings.schedule_hours} 小时执行一次")
         
         # 计算下次执行时间
-        next_run = datetime.now() + timedelta(hours=SCHEDULE_HOURS)
+        next_run = datetime.now() + timedelta(hours=settings.schedule_hours)
         logger.info(f"📅 下次执行时间: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
     
-    def run_once(self):
-        """立即执行一次任务"""
+    def run_once(self) -> Optional[dict]:
+        """立即执行一次任务，返回运行报告"""
         logger.info("🚀 立即执行新闻代理任务...")
-        self.run_news_agent_job()
+        return self.run_news_agent_job()
     
-    def start(self, run_immediately: bool = False):
-        """启动调度器"""
+    def trigger(self) -> bool:
+        """调度器运行期间立即在后台执行一次任务（不影响定时执行时间），任务执行中时不重复启动"""
+        if not self.is_running:
+            logger.warning("调度器未在运行，忽略手动触发")
+            return False
+        logger.info("🚀 收到手动触发，立即执行新闻代理任务...")
+        return self._start_job()
+    
+    def _start_job(self) -> bool:
+        """唤醒常驻任务线程执行一次任务，上一次任务仍在执行时跳过，返回是否启动了任务"""
+        if not self._current_job_done.is_set():
+            logger.warning("上一次任务仍在执行，跳过本次执行")
+            return False
+        # 在唤醒线程前清除事件，避免stop()在任务真正开始前误判为已完成
+        self._current_job_done.clear()
+        if self.job_thread is None or not self.job_thread.is_alive():
+            self.job_thread = threading.Thread(target=self._job_worker, name="news-job", daemon=True)
+            self.job_thread.start()
+        self._job_requested.set()
+        return True
+    
+    def _job_worker(self):
+        """常驻任务线程：每次被_start_job()唤醒后执行一次任务，结束后回到等待"""
+        while True:
+            self._job_requested.wait()
+            self._job_requested.clear()
+            self.run_news_agent_job()
+    
+    def _prepare(self, run_immediately: bool) -> bool:
+        """设置定时任务并标记为运行中，已在运行时返回False"""
         if self.is_running:
             logger.warning("调度器已在运行中")
-            return
+            return False
         
         logger.info("🎯 启动新闻代理调度器...")
+        self.stop_event.clear()
         
         # 设置定时任务
         self.setup_schedule()
+        self.is_running = True
+        self._install_signal_handlers()
         
         # 如果需要立即执行一次
         if run_immediately:
             logger.info("🏃 立即执行首次任务...")
-            self.run_news_agent_job()
-        
-        # 启动调度器线程
-        self.is_running = True
-        self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
-        self.scheduler_thread.start()
-        
-        logger.info("✅ 调度器启动成功，正在后台运行...")
+            self._start_job()
+        return True
     
     def _run_scheduler(self):
-        """运行调度器的内部方法"""
-        while self.is_running and not self.stop_event.is_set():
+        """运行调度器的内部方法：阻塞等待到下次任务到期，stop()设置事件后立即返回
+
+        任务在常驻任务线程中执行，调度循环（run_forever所在的主线程）始终只阻塞在停止事件上，
+        收到信号后stop()可以在有限时间内等待任务收尾再退出
+        """
+        # 循环中反复使用的方法预先绑定为局部变量（is_running和_next_run会被其他线程修改，仍按属性读取）
+        wait = self.stop_event.wait
+        is_set = self.stop_event.is_set
+        start_job = self._start_job
+        monotonic = time.monotonic
+        period = self._period
+        while self.is_running and not is_set():
             try:
-                schedule.run_pending()
-                time.sleep(60)  # 每分钟检查一次
+                delay = self._next_run - monotonic()
+                if delay > 0 and wait(timeout=delay):
+                    break
+                if is_set():
+                    break
+                start_job()
+                # 跳过错过的时间窗口（如系统休眠后），不连续补跑
+                next_run = self._next_run
+                now = monotonic()
+                while next_run <= now:
+                    next_run += period
+                self._next_run = next_run
             except Exception as e:
                 logger.error(f"调度器运行异常: {e}")
-                time.sleep(60)
+                wait(60)
     
     def stop(self):
         """停止调度器"""
-        if not self.is_running:
+        # 信号处理器只清除运行标记，以是否设置了下次执行时间判断是否已完成关闭
+        if self._next_run is None:
             logger.info("调度器未在运行")
             return
         
-        logger.info("🛑 正在停止调度器...")
-        
-        self.is_running = False
+        # 先设置停止事件，调度循环的等待立即返回
         self.stop_event.set()
+        self.is_running = False
+        logger.info("🛑 正在停止调度器...")
         
-        # 等待线程结束
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            self.scheduler_thread.join(timeout=5)
+        # 最多等待SHUTDOWN_GRACE_SECONDS秒让正在执行的任务完成，超时后不再等待（任务线程为守护线程，进程退出时结束）
+        grace = settings.shutdown_grace_seconds
+        if not self._current_job_done.wait(timeout=grace):
+            logger.warning(f"当前任务在 {grace} 秒内未完成，不再等待")
         
-        # 清除定时任务
-        schedule.clear()
+        # 调度循环退出后再清除下次执行时间，避免循环读到None
+        self._next_run = None
+        self._restore_signal_handlers()
         
         logger.info("✅ 调度器已停止")
     
     def get_status(self) -> dict:
         """获取调度器状态"""
-        next_jobs = schedule.jobs
+        next_run = self._next_run
         next_run_time = None
         
-        if next_jobs:
-            next_job = next_jobs[0]
-            next_run_time = next_job.next_run.strftime('%Y-%m-%d %H:%M:%S') if next_job.next_run else None
+        if next_run is not None:
+            next_dt = datetime.now() + timedelta(seconds=next_run - time.monotonic())
+            next_run_time = next_dt.strftime('%Y-%m-%d %H:%M:%S')
         
         return {
             "is_running": self.is_running,
-            "schedule_hours": SCHEDULE_HOURS,
+            "schedule_hours": settings.schedule_hours,
             "next_run_time": next_run_time,
-            "jobs_count": len(next_jobs)
+            "jobs_count": 1 if next_run is not None else 0
         }
     
     def run_forever(self, run_immediately: bool = False):
-        """持续运行调度器（阻塞模式）"""
-        self.start(run_immediately)
+        """持续运行调度器（阻塞模式，调度循环直接在当前线程中运行）"""
+        if not self._prepare(run_immediately):
+            return
         
         try:
             logger.info("🔄 调度器进入持续运行模式，按 Ctrl+C 停止...")
-            while self.is_running:
-                time.sleep(1)
+            # 阻塞等待到任务到期或停止事件（Ctrl+C/SIGTERM由信号处理器设置）
+            self._run_scheduler()
         except KeyboardInterrupt:
             logger.info("收到中断信号，正在停止...")
         finally:
@@ -182,7 +274,7 @@ def main():
     try:
         # 显示状态信息
         logger.info(f"⚙️ 配置信息:")
-        logger.info(f"   - 执行间隔: 每 {SCHEDULE_HOURS} 小时")
+        logger.info(f"   - 执行间隔: 每 {settings.schedule_hours} 小时")
         logger.info(f"   - 当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         # 询问是否立即执行一次
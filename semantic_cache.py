@@ -0,0 +1,157 @@
+"""
+语义缓存模块 - 缓存新闻重要性分析结果
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import orjson
+from loguru import logger
+
+
+def _write_atomic(path: Path, data: bytes):
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class SemanticCache:
+    """
+    新闻分析结果缓存
+
+    先按内容的sha256做精确匹配（零成本），未命中时再用句向量在FAISS索引中
+    查找最相似的已分析新闻，相似度不低于阈值即视为命中
+    """
+
+    EXACT_FILE = "exact.json"
+    INDEX_FILE = "semantic.index"
+    RESULTS_FILE = "semantic.json"
+
+    def __init__(self, cache_dir: str, semantic_enabled: bool = False, model_name: str = "",
+                 threshold: float = 0.92, max_entries: int = 20000):
+        self.cache_dir = Path(cache_dir)
+        self.semantic_enabled = semantic_enabled
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._exact: Dict[str, Dict[str, Any]] = {}
+        self._results: List[Dict[str, Any]] = []
+        self._model = None
+        self._index = None
+
+        self._load()
+
+    @staticmethod
+    def _key(content: str) -> str:
+        """计算内容的精确匹配键"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        """从磁盘加载缓存"""
+        exact_path = self.cache_dir / self.EXACT_FILE
+        try:
+            if exact_path.exists():
+                self._exact = orjson.loads(exact_path.read_bytes())
+        except Exception as e:
+            logger.warning(f"加载精确缓存失败，将重新建立: {e}")
+            self._exact = {}
+
+        if not self.semantic_enabled:
+            return
+
+        try:
+            import faiss
+            # 加载嵌入模型以确定向量维度
+            self._load_model()
+            index_path = self.cache_dir / self.INDEX_FILE
+            results_path = self.cache_dir / self.RESULTS_FILE
+            if index_path.exists() and results_path.exists():
+                self._index = faiss.read_index(str(index_path))
+                self._results = orjson.loads(results_path.read_bytes())
+                if self._index.ntotal != len(self._results):
+                    raise ValueError("索引与结果数量不一致")
+            else:
+                self._index = faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+            logger.info(f"语义缓存已加载，共 {self._index.ntotal} 条记录")
+        except Exception as e:
+            logger.error(f"语义缓存初始化失败，仅使用精确匹配: {e}")
+            self.semantic_enabled = False
+            self._index = None
+            self._results = []
+
+    def _load_model(self):
+        """加载句向量模型"""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"加载语义缓存嵌入模型: {self.model_name}")
+            self._model = SentenceTransformer(self.model_name)
+
+    def _embed(self, content: str):
+        """计算归一化后的句向量，内积即为余弦相似度"""
+        return self._model.encode([content], normalize_embeddings=True).astype('float32')
+
+    def get(self, content: str) -> Optional[Dict[str, Any]]:
+        """查找缓存的分析结果，未命中返回None"""
+        key = self._key(content)
+        with self._lock:
+            hit = self._exact.get(key)
+            if hit is not None:
+                logger.debug("分析缓存精确命中")
+                return dict(hit)
+
+            if not self.semantic_enabled or self._index.ntotal == 0:
+                return None
+
+            scores, ids = self._index.search(self._embed(content), 1)
+            score, idx = float(scores[0][0]), int(ids[0][0])
+            if idx >= 0 and score >= self.threshold:
+                logger.debug(f"分析缓存语义命中，相似度: {score:.3f}")
+                return dict(self._results[idx])
+            return None
+
+    def put(self, content: str, result: Dict[str, Any]):
+        """写入分析结果，失败的结果不缓存"""
+        if result.get('importance') == 'FAILED':
+            return
+
+        key = self._key(content)
+        with self._lock:
+            self._exact[key] = dict(result)
+            # 超出上限时淘汰最早的记录
+            while len(self._exact) > self.max_entries:
+                self._exact.pop(next(iter(self._exact)))
+
+            if self.semantic_enabled:
+                self._index.add(self._embed(content))
+                self._results.append(dict(result))
+                if self._index.ntotal > self.max_entries:
+                    self._shrink_index()
+
+    def _shrink_index(self):
+        """保留较新的一半记录并重建索引"""
+        import faiss
+        keep = self.max_entries // 2
+        start = self._index.ntotal - keep
+        vectors = self._index.reconstruct_n(start, keep)
+        index = faiss.IndexFlatIP(self._index.d)
+        index.add(vectors)
+        self._index = index
+        self._results = self._results[start:]
+
+    def save(self):
+        """将缓存持久化到磁盘"""
+        try:
+            with self._lock:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                _write_atomic(self.cache_dir / self.EXACT_FILE, orjson.dumps(self._exact))
+                if self.semantic_enabled:
+                    import faiss
+                    faiss.write_index(self._index, str(self.cache_dir / self.INDEX_FILE))
+                    _write_atomic(self.cache_dir / self.RESULTS_FILE, orjson.dumps(self._results))
+            logger.debug(f"分析缓存已保存到 {self.cache_dir}")
+        except Exception as e:
+            logger.error(f"保存分析缓存失败: {e}")
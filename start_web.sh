@@ -9,4 +9,4 @@ echo "=== 检查Python文件 ==="
 ls -la *.py
 
 echo "=== 启动Web服务 ==="
-python web_main.py
+exec gunicorn -c gunicorn_conf.py web_main:app
@@ -0,0 +1,386 @@
+"""
+Web服务入口模块（用于Render部署）
+
+ASGI应用提供健康检查和主页端点，并在启动时于独立子进程运行定时调度器，
+AI分析的CPU开销不会与请求处理争抢GIL。
+生产环境通过 gunicorn -c gunicorn_conf.py web_main:app 启动
+"""
+import asyncio
+import fcntl
+import functools
+import hmac
+import multiprocessing
+import os
+import signal
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, Optional
+import orjson
+from loguru import logger
+
+from config import settings
+from database import test_database_connection
+from news_fetcher import test_news_fetcher
+from scheduler import news_scheduler
+
+
+# Web服务的JSON响应头
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+# 响应中的时间戳缓存200毫秒，同一时间窗口内的请求共用一次格式化结果
+_TIMESTAMP_TTL = 0.2
+_cached_timestamp = ("", 0.0)
+
+# 连通性检查要连接数据库和新闻API，结果在该秒数内重复请求时直接复用
+_TEST_CACHE_TTL = 30
+_test_cache: Dict[str, Any] = {"ts": 0.0, "result": None, "lock": asyncio.Lock()}
+
+# 报告中写入状态文件的字段
+REPORT_FIELDS = ("success", "timestamp", "raw_news_count", "important_news_count", "saved_count", "error")
+
+# 持有调度器文件锁的文件对象，进程存活期间保持打开
+_scheduler_lock: Optional[IO[str]] = None
+
+# 调度器子进程（只在获得文件锁的worker中存在）
+_mp_context = multiprocessing.get_context("spawn")
+_scheduler_process: Optional[multiprocessing.process.BaseProcess] = None
+# lifespan关闭阶段置为True，此后子进程退出属于正常停止
+_scheduler_stopping = False
+
+
+def _acquire_scheduler_lock() -> bool:
+    """尝试获取调度器文件锁，成功表示当前进程负责运行调度器"""
+    global _scheduler_lock
+    lock_file = open(settings.scheduler_lock_file, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    _scheduler_lock = lock_file
+    return True
+
+
+def _child_lock_path() -> str:
+    """调度器子进程存活期间持有的文件锁（进程退出后由内核自动释放）"""
+    return f"{settings.scheduler_lock_file}.child"
+
+
+def _lock_held(path: str) -> bool:
+    """文件锁是否被其他打开的文件持有"""
+    try:
+        with open(path, "rb") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return False
+    except FileNotFoundError:
+        return False
+
+
+def _scheduler_alive(state: Dict[str, Any]) -> bool:
+    """状态文件中记录的调度器子进程是否仍在运行（子进程文件锁仍被持有且pid存在）"""
+    if not state.get("running") or not _lock_held(_child_lock_path()):
+        return False
+    try:
+        os.kill(state["pid"], 0)
+    except (KeyError, TypeError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _write_scheduler_state(state: Dict[str, Any]):
+    """由调度器子进程写入状态文件（先写临时文件再替换），所有worker都可读取"""
+    path = Path(settings.scheduler_state_file)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_bytes(orjson.dumps(state, default=str))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f"写入调度器状态文件失败: {e}")
+
+
+def _read_scheduler_state() -> Optional[Dict[str, Any]]:
+    """读取调度器子进程写入的状态，文件不存在或损坏时返回None"""
+    try:
+        return orjson.loads(Path(settings.scheduler_state_file).read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def _scheduler_process_main():
+    """调度器子进程入口"""
+    from log_setup import setup_logging
+
+    setup_logging()
+
+    # 子进程自己持有存活锁，崩溃或被OOM结束后锁随之释放，其他worker据此判断调度器是否存活
+    child_lock = open(_child_lock_path(), "w")
+    try:
+        fcntl.flock(child_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        logger.error("另一个调度器子进程仍在运行，当前子进程退出")
+        child_lock.close()
+        return
+
+    state: Dict[str, Any] = {
+        "pid": os.getpid(), "running": True, "job_running": False, "last_activity": None, "last_report": None
+    }
+
+    def record_job_start():
+        state["job_running"] = True
+        _write_scheduler_state(state)
+
+    def record_job_done(report: Optional[dict]):
+        state["job_running"] = False
+        state["last_activity"] = time.time()
+        state["last_report"] = {key: report.get(key) for key in REPORT_FIELDS} if report else {"success": False}
+        _write_scheduler_state(state)
+
+    # 终端Ctrl+C的SIGINT会同时发给同一进程组的子进程，忽略它，只由父进程的SIGTERM触发关闭
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    news_scheduler.on_job_start = record_job_start
+    news_scheduler.on_job_done = record_job_done
+    # 任意worker收到 POST /run-once 后向子进程发送SIGUSR1，手动任务也只在调度器进程中执行
+    signal.signal(signal.SIGUSR1, lambda signum, frame: news_scheduler.trigger())
+    _write_scheduler_state(state)
+    try:
+        logger.info("启动后台新闻调度器...")
+        news_scheduler.run_forever(run_immediately=True)
+    except Exception as e:
+        logger.error(f"调度器错误: {e}")
+    finally:
+        state["running"] = False
+        state["job_running"] = False
+        _write_scheduler_state(state)
+        child_lock.close()
+
+
+def start_background_scheduler():
+    """在子进程启动调度器（多worker时只有获得文件锁的进程启动）"""
+    global _scheduler_process
+    if not _acquire_scheduler_lock():
+        logger.info(f"调度器已由其他worker运行，当前进程(PID {os.getpid()})只提供Web服务")
+        return
+
+    _scheduler_process = _mp_context.Process(
+        target=_scheduler_process_main,
+        name="news-scheduler",
+        daemon=True
+    )
+    _scheduler_process.start()
+    logger.info(f"调度器子进程已启动，PID {_scheduler_process.pid}")
+
+
+def stop_background_scheduler():
+    """停止调度器子进程（SIGTERM触发调度器的优雅关闭）"""
+    global _scheduler_stopping
+    _scheduler_stopping = True
+    if _scheduler_process is None or not _scheduler_process.is_alive():
+        return
+    _scheduler_process.terminate()
+    # 子进程会等待当前任务完成（最多SHUTDOWN_GRACE_SECONDS秒）再退出
+    _scheduler_process.join(timeout=settings.shutdown_grace_seconds + 5)
+    if _scheduler_process.is_alive():
+        logger.warning("调度器子进程未按时退出，强制结束")
+        _scheduler_process.kill()
+
+
+def _scheduler_process_dead() -> bool:
+    """当前worker启动的调度器子进程是否意外退出（其他worker或关闭阶段返回False）"""
+    return _scheduler_process is not None and not _scheduler_stopping and not _scheduler_process.is_alive()
+
+
+def _scheduler_status() -> Optional[dict]:
+    """调度器状态（从状态文件读取，任意worker返回的结果相同），调度器从未启动时返回None"""
+    state = _read_scheduler_state()
+    if state is None:
+        return None
+    running = _scheduler_alive(state)
+    last_activity = state.get("last_activity")
+    return {
+        "running": running,
+        "pid": state.get("pid"),
+        "job_running": running and bool(state.get("job_running")),
+        "last_activity": _format_timestamp(last_activity) if last_activity else None,
+        "last_report": state.get("last_report")
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def _format_timestamp(timestamp: float) -> str:
+    """格式化Unix时间戳（只在任务结束、时间戳变化后重新格式化）"""
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+def _now_iso() -> str:
+    """当前时间的ISO格式字符串（最多缓存_TIMESTAMP_TTL秒）"""
+    global _cached_timestamp
+    text, created = _cached_timestamp
+    now = time.monotonic()
+    if now - created >= _TIMESTAMP_TTL:
+        text = datetime.now().isoformat()
+        _cached_timestamp = (text, now)
+    return text
+
+
+def _run_connectivity_checks() -> Dict[str, bool]:
+    """检查数据库和新闻API的连通性（只读，不调用LLM、不写数据库）"""
+    results = {}
+    for name, check in (("database", test_database_connection), ("news_api", test_news_fetcher)):
+        try:
+            results[name] = bool(check())
+        except Exception as e:
+            logger.error(f"连通性检查 {name} 异常: {e}")
+            results[name] = False
+    return results
+
+
+def _check_admin(scope) -> Optional[tuple]:
+    """校验管理端点的X-Admin-Token请求头，通过时返回None，否则返回(状态码, 响应)"""
+    token = settings.admin_token
+    if not token:
+        return 403, {"error": "未配置ADMIN_TOKEN，管理端点已禁用"}
+    for name, value in scope["headers"]:
+        if name == b"x-admin-token" and hmac.compare_digest(value, token.encode()):
+            return None
+    return 401, {"error": "缺少或错误的X-Admin-Token"}
+
+
+async def _send_json(send, status: int, payload: dict):
+    """发送JSON响应（无法直接序列化的对象转为字符串）"""
+    await send({"type": "http.response.start", "status": status, "headers": JSON_HEADERS})
+    await send({"type": "http.response.body", "body": orjson.dumps(payload, default=str)})
+
+
+async def _handle_test(send):
+    """连通性检查（30秒内重复请求直接返回上次的结果）"""
+    async with _test_cache["lock"]:
+        age = time.monotonic() - _test_cache["ts"]
+        if _test_cache["result"] is None or age >= _TEST_CACHE_TTL:
+            _test_cache["result"] = await asyncio.to_thread(_run_connectivity_checks)
+            _test_cache["ts"] = time.monotonic()
+            age = 0.0
+        result = _test_cache["result"]
+    await _send_json(send, 200, {
+        "checks": result,
+        "success": all(result.values()),
+        "cached_for_seconds": int(_TEST_CACHE_TTL - age),
+        "timestamp": _now_iso()
+    })
+
+
+async def _handle_run_once(send):
+    """通知调度器子进程立即执行一次任务（任务执行中时不重复触发）"""
+    state = _read_scheduler_state()
+    if state is None or not _scheduler_alive(state):
+        await _send_json(send, 503, {"error": "调度器未运行"})
+        return
+    if state.get("job_running"):
+        await _send_json(send, 202, {"status": "running", "status_url": "/status"})
+        return
+    try:
+        os.kill(state["pid"], signal.SIGUSR1)
+    except (ProcessLookupError, PermissionError) as e:
+        logger.error(f"通知调度器执行任务失败: {e}")
+        await _send_json(send, 503, {"error": "调度器未运行"})
+        return
+    logger.info(f"已通知调度器子进程(PID {state['pid']})执行一次任务")
+    await _send_json(send, 202, {"status": "accepted", "status_url": "/status"})
+
+
+async def _lifespan(receive, send):
+    """处理ASGI生命周期事件：启动时运行调度器，关闭时停止调度器"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            start_background_scheduler()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.to_thread(stop_background_scheduler)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """健康检查和主页的ASGI应用"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"]
+    if path == "/health":
+        # 调度器子进程意外退出时返回503，由部署平台的健康检查重启服务
+        if _scheduler_process_dead():
+            await _send_json(send, 503, {
+                "status": "unhealthy",
+                "service": "News Agent System",
+                "error": f"调度器子进程已退出（exitcode {_scheduler_process.exitcode}）",
+                "timestamp": _now_iso()
+            })
+            return
+        await _send_json(send, 200, {
+            "status": "healthy",
+            "service": "News Agent System",
+            "timestamp": _now_iso()
+        })
+    elif path == "/":
+        await _send_json(send, 200, {
+            "service": "News Agent System",
+            "status": "running",
+            "description": "基于LangChain + LangGraph的智能新闻分析系统",
+            "scheduler": _scheduler_status(),
+            "timestamp": _now_iso()
+        })
+    elif path in ("/test", "/run-once"):
+        # 管理端点会访问数据库/新闻API或触发LLM调用，只接受带令牌的POST请求
+        if scope["method"] != "POST":
+            await _send_json(send, 405, {"error": "请使用POST请求"})
+            return
+        denied = _check_admin(scope)
+        if denied is not None:
+            await _send_json(send, *denied)
+            return
+        if path == "/test":
+            await _handle_test(send)
+        else:
+            await _handle_run_once(send)
+    elif path == "/status":
+        await _send_json(send, 200, {
+            "scheduler": _scheduler_status(),
+            "timestamp": _now_iso()
+        })
+    else:
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def run_web_server():
+    """以单进程uvicorn启动Web服务（本地运行或 python main.py --web）"""
+    import uvicorn
+
+    # 安装了uvloop/httptools时自动使用
+    port = int(os.environ.get('PORT', 8000))
+    logger.info(f"🌐 Web服务器启动在端口 {port}")
+    logger.info("📡 健康检查端点: /health")
+    logger.info("🏠 主页端点: /")
+    logger.info("🧪 管理端点（需X-Admin-Token）: POST /test、POST /run-once，状态查询: /status")
+
+    uvicorn.run(app, host="0.0.0.0", port=port, loop="auto", http="auto", access_log=False)
+    logger.info("👋 Web服务器关闭")
+
+
+if __name__ == "__main__":
+    from log_setup import setup_logging
+
+    setup_logging()
+    run_web_server()